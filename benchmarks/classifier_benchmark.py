@@ -0,0 +1,124 @@
+"""Micro-benchmark: compiled MessageClassifier vs. the old keyword scans.
+
+Run from the repository root::
+
+    python benchmarks/classifier_benchmark.py --messages 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from time_profiler.chatbot.classifier import (  # noqa: E402
+    DEFAULT_CLASSIFIER_KEYWORDS,
+    MessageClassifier,
+)
+
+
+def legacy_classify(text: str) -> str:
+    """The substring-scan classifier MessageClassifier replaced."""
+    text_lower = text.lower()
+    time_keywords = ["spent", "hours", "time", "allocation", "working on", "% on"]
+    problem_keywords = ["problem", "issue", "frustrating", "difficult", "broken", "bug"]
+    success_keywords = ["success", "achievement", "completed", "good", "well", "productive"]
+    if any(keyword in text_lower for keyword in time_keywords):
+        return "time_allocation"
+    elif any(keyword in text_lower for keyword in problem_keywords):
+        return "problem_report"
+    elif any(keyword in text_lower for keyword in success_keywords):
+        return "success_story"
+    return "general"
+
+
+FILLER = (
+    "the team met with our sponsor about the protocol and then reviewed site "
+    "enrollment numbers before lunch while drafting notes for the next review"
+).split()
+SIGNALS = [
+    "I spent 6 hours on analysis",
+    "50% on meetings, 50% on research",
+    "the export is broken again",
+    "frustrating bug in the portal",
+    "we completed the submission",
+    "really productive week",
+    "can you show my dashboard",
+]
+
+
+def make_corpus(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(5, 40))
+        words.insert(rng.randint(0, len(words)), rng.choice(SIGNALS))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def substring_classifier(table):
+    """The legacy scan strategy generalised to an arbitrary keyword table."""
+    lists = [(category, [w.rstrip("*") for w in words]) for category, words in table.items()]
+
+    def classify(text: str) -> str:
+        text_lower = text.lower()
+        for category, words in lists:
+            if any(word in text_lower for word in words):
+                return category
+        return "general"
+
+    return classify
+
+
+def expanded_table(extra: int, seed: int = 11) -> dict:
+    """Default table plus ``extra`` synthetic keywords spread over the categories."""
+    rng = random.Random(seed)
+    table = {category: list(words) for category, words in DEFAULT_CLASSIFIER_KEYWORDS.items()}
+    categories = list(table)
+    for i in range(extra):
+        word = "".join(rng.choices("bcdfghjklmnpqrstvwxz", k=3)) + "term" + str(i)
+        table[categories[i % len(categories)]].append(word)
+    return table
+
+
+def bench(fn, corpus, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--extra-keywords", type=int, nargs="*", default=[0, 100, 500],
+        help="synthetic keywords added to the table for each run",
+    )
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    agree = sum(legacy_classify(t) == MessageClassifier().classify(t) for t in corpus) / len(corpus)
+    print(f"{len(corpus)} messages; label agreement with the old classifier: {agree:.1%}")
+
+    for extra in args.extra_keywords:
+        table = expanded_table(extra)
+        size = sum(len(words) for words in table.values())
+        legacy = bench(substring_classifier(table), corpus, args.repeat)
+        compiled = bench(MessageClassifier(table).classify, corpus, args.repeat)
+        print(f"\n{size} keywords")
+        for name, seconds in (("substring scans", legacy), ("compiled classifier", compiled)):
+            print(f"  {name:20s} {seconds * 1000:8.1f} ms  {len(corpus) / seconds:10.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
 """AI insights and analysis tools."""
 
-from .problem_analyzer import ProblemAggregator
+from .problem_analyzer import ProblemAggregator, ProblemIndex, get_problem_index
 from .jira_integration import (
     JiraClient,
+    JiraHTTPSession,
     MCPJiraClient,
+    get_jira_http,
     create_ticket_if_not_exists,
+    create_tickets_if_not_exist,
     escalate_ticket,
+    escalate_tickets,
     archive_and_create_new_ticket,
     update_solution_impact,
 )
 
-from .sentiment import analyze_sentiment
+from .sentiment import analyze_sentiment, analyze_sentiment_batch
 from .solution_engine import (
     SolutionEngine,
     estimate_effort,
@@ -20,13 +24,20 @@ from .solution_engine import (
 
 __all__ = [
     "ProblemAggregator",
+    "ProblemIndex",
+    "get_problem_index",
     "JiraClient",
+    "JiraHTTPSession",
     "MCPJiraClient",
+    "get_jira_http",
     "create_ticket_if_not_exists",
+    "create_tickets_if_not_exist",
     "escalate_ticket",
+    "escalate_tickets",
     "archive_and_create_new_ticket",
     "update_solution_impact",
     "analyze_sentiment",
+    "analyze_sentiment_batch",
     "SolutionEngine",
     "estimate_effort",
     "calculate_roi",
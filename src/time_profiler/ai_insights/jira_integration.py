@@ -2,23 +2,133 @@ from __future__ import annotations
 
 """Jira integration helpers for ticket lifecycle management."""
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from datetime import datetime
+import logging
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .. import models
 from ..app import SessionLocal
 
+logger = logging.getLogger(__name__)
+
+# Jira Cloud accepts at most 50 issues per bulk create request
+JIRA_BULK_CREATE_LIMIT = 50
+
+
+class JiraHTTPSession:
+    """Pooled HTTP session shared by the Jira REST and MCP code paths.
+
+    Connections are kept alive in a pool of ``pool_size`` per host. Requests
+    answered with one of ``retry_statuses`` (or failing to connect) are
+    retried up to ``max_retries`` times with exponential backoff, honouring
+    ``Retry-After``. Every call here is a POST and issue creation is not
+    idempotent, so by default only 429 and 503 are retried: Jira sends them
+    before doing any work. A 500, 502 or 504 may come after the issue was
+    created and is returned to the caller instead. Latency is recorded per
+    operation name.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retry_statuses: Tuple[int, ...] = (429, 503),
+    ) -> None:
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_statuses,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    def post(self, operation: str, url: str, payload: Dict[str, Any], auth=None) -> requests.Response:
+        """POST ``payload`` as JSON and record the latency under ``operation``."""
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.post(url, json=payload, auth=auth, timeout=self.timeout)
+            failed = False
+            return response
+        finally:
+            self._record(operation, (time.perf_counter() - started) * 1000, failed)
+
+    def _record(self, operation: str, elapsed_ms: float, failed: bool) -> None:
+        with self._lock:
+            entry = self._latency.setdefault(
+                operation, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            entry["count"] += 1
+            entry["errors"] += int(failed)
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return call count, error count and average/max latency per operation."""
+        with self._lock:
+            return {
+                operation: {
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "avg_ms": entry["total_ms"] / entry["count"],
+                    "max_ms": entry["max_ms"],
+                }
+                for operation, entry in self._latency.items()
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_jira_http: Optional[JiraHTTPSession] = None
+_jira_http_lock = threading.Lock()
+
+
+def get_jira_http() -> JiraHTTPSession:
+    """Return the process-wide Jira session, configured from the environment."""
+    global _jira_http
+    with _jira_http_lock:
+        if _jira_http is None:
+            _jira_http = JiraHTTPSession(
+                pool_size=int(os.getenv("JIRA_POOL_SIZE", "10")),
+                max_retries=int(os.getenv("JIRA_MAX_RETRIES", "3")),
+                backoff_factor=float(os.getenv("JIRA_BACKOFF_FACTOR", "0.5")),
+                connect_timeout=float(os.getenv("JIRA_CONNECT_TIMEOUT", "3.05")),
+                read_timeout=float(os.getenv("JIRA_READ_TIMEOUT", "10")),
+            )
+        return _jira_http
+
 
 class JiraClient:
     """Lightweight Jira API client with optional MCP support."""
 
-    def __init__(self, base_url: str, user: str, api_token: str, project_key: str, mcp_endpoint: str | None = None) -> None:
+    def __init__(self, base_url: str, user: str, api_token: str, project_key: str, mcp_endpoint: str | None = None, http: JiraHTTPSession | None = None) -> None:
         self.base_url = base_url.rstrip("/")
         self.auth = (user, api_token)
         self.project_key = project_key
         self.mcp_endpoint = (mcp_endpoint or os.getenv("MCP_ENDPOINT", "")).rstrip("/") if (mcp_endpoint or os.getenv("MCP_ENDPOINT")) else None
+        self.http = http or get_jira_http()
 
     def create_ticket(self, summary: str, description: str, issue_type: str = "Task") -> str:
         """Create a Jira ticket and return the ticket key."""
@@ -32,7 +142,7 @@ class JiraClient:
                     "issue_type": issue_type,
                 },
             }
-            response = requests.post(self.mcp_endpoint, json=payload, timeout=10)
+            response = self.http.post("mcp_create_ticket", self.mcp_endpoint, payload)
             if response.status_code != 200:
                 raise RuntimeError(f"MCP ticket creation failed: {response.text}")
             data = response.json()
@@ -48,7 +158,7 @@ class JiraClient:
                 "issuetype": {"name": issue_type},
             }
         }
-        response = requests.post(url, json=payload, auth=self.auth, timeout=10)
+        response = self.http.post("create_ticket", url, payload, auth=self.auth)
         if response.status_code != 201:
             raise RuntimeError(f"Failed to create ticket: {response.text}")
         return response.json().get("key")
@@ -60,22 +170,116 @@ class JiraClient:
                 "action": "transition_ticket",
                 "data": {"ticket_key": ticket_key, "transition_id": transition_id},
             }
-            response = requests.post(self.mcp_endpoint, json=payload, timeout=10)
+            response = self.http.post("mcp_transition_ticket", self.mcp_endpoint, payload)
             if response.status_code != 200:
                 raise RuntimeError(f"MCP transition failed: {response.text}")
             return
         url = f"{self.base_url}/rest/api/2/issue/{ticket_key}/transitions"
         payload = {"transition": {"id": transition_id}}
-        response = requests.post(url, json=payload, auth=self.auth, timeout=10)
+        response = self.http.post("transition_ticket", url, payload, auth=self.auth)
         if response.status_code not in {200, 204}:
             raise RuntimeError(f"Failed to transition ticket: {response.text}")
 
+    def create_tickets(self, issues: Sequence[Tuple[str, str]], issue_type: str = "Task") -> List[Optional[str]]:
+        """Create many tickets from ``(summary, description)`` pairs.
+
+        Uses Jira's bulk create endpoint (or the MCP ``create_tickets``
+        action) in chunks of :data:`JIRA_BULK_CREATE_LIMIT`. Returns the new
+        keys in input order, with None for issues Jira rejected and for every
+        issue in a chunk whose request failed; keys from the other chunks are
+        still returned.
+        """
+        keys: List[Optional[str]] = []
+        for start in range(0, len(issues), JIRA_BULK_CREATE_LIMIT):
+            chunk = issues[start:start + JIRA_BULK_CREATE_LIMIT]
+            try:
+                if self.mcp_endpoint:
+                    keys.extend(self._create_tickets_mcp(chunk, issue_type))
+                else:
+                    keys.extend(self._create_tickets_rest(chunk, issue_type))
+            except (RuntimeError, requests.RequestException, ValueError) as exc:
+                logger.warning("Bulk creation of issues %d-%d failed: %s", start, start + len(chunk) - 1, exc)
+                keys.extend([None] * len(chunk))
+        return keys
+
+    def _create_tickets_rest(self, issues: Sequence[Tuple[str, str]], issue_type: str) -> List[Optional[str]]:
+        url = f"{self.base_url}/rest/api/2/issue/bulk"
+        payload = {
+            "issueUpdates": [
+                {
+                    "fields": {
+                        "project": {"key": self.project_key},
+                        "summary": summary,
+                        "description": description,
+                        "issuetype": {"name": issue_type},
+                    }
+                }
+                for summary, description in issues
+            ]
+        }
+        response = self.http.post("create_tickets", url, payload, auth=self.auth)
+        # Jira answers 400 when every issue failed, with per-issue errors
+        if response.status_code not in {200, 201, 400}:
+            raise RuntimeError(f"Failed to create tickets: {response.text}")
+        data = response.json()
+        errors = data.get("errors") or []
+        if response.status_code == 400 and not errors:
+            raise RuntimeError(f"Failed to create tickets: {response.text}")
+        failed = {error.get("failedElementNumber") for error in errors}
+        for error in errors:
+            logger.warning("Jira rejected bulk issue %s: %s", error.get("failedElementNumber"), error.get("elementErrors"))
+        created = iter(issue.get("key") for issue in data.get("issues", []))
+        return [None if i in failed else next(created, None) for i in range(len(issues))]
+
+    def _create_tickets_mcp(self, issues: Sequence[Tuple[str, str]], issue_type: str) -> List[Optional[str]]:
+        payload = {
+            "action": "create_tickets",
+            "data": {
+                "project_key": self.project_key,
+                "issue_type": issue_type,
+                "tickets": [
+                    {"summary": summary, "description": description}
+                    for summary, description in issues
+                ],
+            },
+        }
+        response = self.http.post("mcp_create_tickets", self.mcp_endpoint, payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"MCP bulk ticket creation failed: {response.text}")
+        keys = response.json().get("ticket_keys")
+        if not isinstance(keys, list) or len(keys) != len(issues):
+            raise RuntimeError("Invalid MCP response")
+        return [key or None for key in keys]
+
+    def transition_tickets(
+        self, ticket_keys: Iterable[str], transition_id: str, max_workers: int = 8
+    ) -> Dict[str, Exception]:
+        """Transition many tickets concurrently.
+
+        At most ``max_workers`` transitions are in flight at once. Returns the
+        error for each ticket that failed; an empty dict means all succeeded.
+        """
+        ticket_keys = list(ticket_keys)
+        if not ticket_keys:
+            return {}
+
+        def transition(key: str) -> Optional[Exception]:
+            try:
+                self.transition_ticket(key, transition_id)
+            except Exception as exc:  # collected per ticket
+                return exc
+            return None
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(ticket_keys))) as executor:
+            results = executor.map(transition, ticket_keys)
+            return {key: error for key, error in zip(ticket_keys, results) if error is not None}
+
 
 class MCPJiraClient(JiraClient):
     """Jira client that communicates via Model Context Protocol (MCP)."""
 
-    def __init__(self, base_url: str, user: str, api_token: str, project_key: str, mcp_endpoint: str) -> None:
-        super().__init__(base_url, user, api_token, project_key)
+    def __init__(self, base_url: str, user: str, api_token: str, project_key: str, mcp_endpoint: str, http: JiraHTTPSession | None = None) -> None:
+        super().__init__(base_url, user, api_token, project_key, http=http)
         self.mcp_endpoint = mcp_endpoint.rstrip("/")
 
     def create_ticket_via_mcp(self, summary: str, description: str, issue_type: str = "Task") -> str:
@@ -89,7 +293,7 @@ class MCPJiraClient(JiraClient):
                 "issue_type": issue_type,
             },
         }
-        response = requests.post(self.mcp_endpoint, json=payload, timeout=10)
+        response = self.http.post("mcp_create_ticket", self.mcp_endpoint, payload)
         if response.status_code != 200:
             raise RuntimeError(f"MCP ticket creation failed: {response.text}")
         data = response.json()
@@ -103,7 +307,7 @@ class MCPJiraClient(JiraClient):
             "action": "transition_ticket",
             "data": {"ticket_key": ticket_key, "transition_id": transition_id},
         }
-        response = requests.post(self.mcp_endpoint, json=payload, timeout=10)
+        response = self.http.post("mcp_transition_ticket", self.mcp_endpoint, payload)
         if response.status_code != 200:
             raise RuntimeError(f"MCP transition failed: {response.text}")
 
@@ -136,6 +340,84 @@ def escalate_ticket(session, client: JiraClient, ticket: models.JiraTicketLifecy
     session.commit()
 
 
+def create_tickets_if_not_exist(
+    session,
+    client: JiraClient,
+    problems: Iterable[Tuple[int, str, str]],
+    issue_type: str = "Task",
+) -> Dict[int, models.JiraTicketLifecycle]:
+    """Batch form of :func:`create_ticket_if_not_exists`.
+
+    ``problems`` holds ``(problem_id, summary, description)`` tuples. Open
+    tickets are looked up in one query, missing ones are created with one
+    bulk call per chunk, and each chunk's new rows are committed as soon as
+    Jira returns their keys. Returns the open ticket for each problem;
+    problems Jira rejected, or whose chunk failed, are left out.
+    """
+    problems = {problem_id: (summary, description) for problem_id, summary, description in problems}
+    if not problems:
+        return {}
+    tickets: Dict[int, models.JiraTicketLifecycle] = {}
+    for ticket in (
+        session.query(models.JiraTicketLifecycle)
+        .filter(models.JiraTicketLifecycle.problem_id.in_(list(problems)), models.JiraTicketLifecycle.status == "Open")
+        .order_by(models.JiraTicketLifecycle.id)
+    ):
+        tickets.setdefault(ticket.problem_id, ticket)
+
+    missing = [problem_id for problem_id in problems if problem_id not in tickets]
+    # Commit after every chunk so issues already created in Jira stay linked
+    # even if a later chunk fails
+    for start in range(0, len(missing), JIRA_BULK_CREATE_LIMIT):
+        chunk = missing[start:start + JIRA_BULK_CREATE_LIMIT]
+        keys = client.create_tickets([problems[problem_id] for problem_id in chunk], issue_type)
+        for problem_id, key in zip(chunk, keys):
+            if key is None:
+                continue
+            ticket = models.JiraTicketLifecycle(
+                problem_id=problem_id,
+                ticket_key=key,
+                status="Open",
+                priority="Low",
+            )
+            session.add(ticket)
+            tickets[problem_id] = ticket
+        session.commit()
+    return tickets
+
+
+def escalate_tickets(
+    session,
+    client: JiraClient,
+    tickets: Iterable[models.JiraTicketLifecycle],
+    new_priority: str,
+    max_workers: int = 8,
+) -> List[models.JiraTicketLifecycle]:
+    """Batch form of :func:`escalate_ticket`.
+
+    Transitions are issued concurrently (see
+    :meth:`JiraClient.transition_tickets`) and every successfully escalated
+    ticket is updated in one commit. Returns the escalated tickets; tickets
+    whose transition failed are logged and left unchanged.
+    """
+    pending = [ticket for ticket in tickets if ticket.priority != new_priority]
+    if not pending:
+        return []
+    errors = client.transition_tickets([t.ticket_key for t in pending], "escalate", max_workers=max_workers)
+    now = datetime.utcnow()
+    escalated = []
+    for ticket in pending:
+        if ticket.ticket_key in errors:
+            logger.warning("Failed to escalate %s: %s", ticket.ticket_key, errors[ticket.ticket_key])
+            continue
+        ticket.priority = new_priority
+        ticket.escalation_count += 1
+        ticket.last_updated = now
+        escalated.append(ticket)
+    session.commit()
+    return escalated
+
+
 def archive_and_create_new_ticket(session, client: JiraClient, ticket: models.JiraTicketLifecycle, summary: str, description: str, priority: str = "High") -> models.JiraTicketLifecycle:
     """Close an old ticket and open a new escalated one."""
     client.transition_ticket(ticket.ticket_key, "close")
@@ -3,12 +3,203 @@
 from __future__ import annotations
 
 import re
-from collections import Counter
-from datetime import datetime, timedelta
-from typing import Iterable, List, Tuple
+import threading
+import time
+import weakref
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
-from ..models import ProblemIdentification
+from sqlalchemy import case, func, literal, select
+
+from ..models import ProblemIdentification, ProblemReportCount
 from ..app import SessionLocal
+from ..reporting import upsert_increment
+
+
+def _tokenize(text: str) -> set[str]:
+    words = re.findall(r"\w+", text.lower())
+    normalized = []
+    for w in words:
+        if w.endswith("es"):
+            w = w[:-2]
+        elif w.endswith("s"):
+            w = w[:-1]
+        normalized.append(w)
+    return set(normalized)
+
+
+# Ids per IN (...) query when loading missing rows
+_SYNC_CHUNK = 500
+# How far below the highest indexed id each lookup re-checks for rows that
+# other workers committed out of id order
+_SYNC_LOOKBACK = 1000
+# Seconds between full count/sum reconciliations with the table
+_RECONCILE_INTERVAL = 300.0
+
+
+class ProblemIndex:
+    """Inverted index from description tokens to problem ids.
+
+    Built once per database engine and kept in sync incrementally. Each
+    lookup lists the ids above ``highest indexed id - lookback`` (a bounded
+    primary-key range) and loads the ones not yet indexed, so rows another
+    worker commits with a slightly lower id are still picked up. Every
+    ``reconcile_interval`` seconds the table's row count and id sum are
+    compared with the index, which catches older missing rows and deleted
+    ones. Edits made through this process are applied with :meth:`add`.
+    Candidates are always re-checked against the stored description, so a
+    stale entry (e.g. a description edited by another process) can cause a
+    missed match but never a wrong one.
+    """
+
+    def __init__(
+        self,
+        lookback: int = _SYNC_LOOKBACK,
+        reconcile_interval: float = _RECONCILE_INTERVAL,
+    ) -> None:
+        self.lookback = lookback
+        self.reconcile_interval = reconcile_interval
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._tokens: Dict[int, FrozenSet[str]] = {}
+        self._id_sum = 0
+        self._high_water = 0
+        # The first sync builds the index through a full reconciliation
+        self._next_reconcile = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _add_locked(self, problem_id: int, description: str) -> None:
+        self._remove_locked(problem_id)
+        tokens = frozenset(_tokenize(description))
+        self._tokens[problem_id] = tokens
+        self._id_sum += problem_id
+        self._high_water = max(self._high_water, problem_id)
+        for token in tokens:
+            self._postings[token].add(problem_id)
+
+    def _remove_locked(self, problem_id: int) -> None:
+        if problem_id not in self._tokens:
+            return
+        self._id_sum -= problem_id
+        for token in self._tokens.pop(problem_id):
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(problem_id)
+                if not ids:
+                    del self._postings[token]
+
+    def add(self, problem_id: int, description: str) -> None:
+        """Index or re-index a problem description."""
+        with self._lock:
+            self._add_locked(problem_id, description)
+
+    def remove(self, problem_id: int) -> None:
+        """Drop a problem from the index."""
+        with self._lock:
+            self._remove_locked(problem_id)
+
+    def sync(self, session) -> None:
+        """Index problems committed since the last lookup.
+
+        Ids are not assumed to arrive in order: another worker may commit a
+        row with a lower id than one this process already indexed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            reconcile = now >= self._next_reconcile
+            if reconcile:
+                self._next_reconcile = now + self.reconcile_interval
+            floor = self._high_water - self.lookback
+        if reconcile:
+            self.reconcile(session)
+            return
+        recent = set(session.scalars(
+            select(ProblemIdentification.id).where(ProblemIdentification.id > floor)
+        ))
+        with self._lock:
+            missing = recent - self._tokens.keys()
+        if missing:
+            self._load(session, missing)
+
+    def reconcile(self, session) -> None:
+        """Compare the whole table with the index and fix any difference."""
+        count, id_sum = session.execute(
+            select(
+                func.count(ProblemIdentification.id),
+                func.coalesce(func.sum(ProblemIdentification.id), 0),
+            )
+        ).one()
+        with self._lock:
+            if count == len(self._tokens) and id_sum == self._id_sum:
+                return
+            indexed = set(self._tokens)
+        stored = set(session.scalars(select(ProblemIdentification.id)))
+        with self._lock:
+            for problem_id in indexed - stored:
+                self._remove_locked(problem_id)
+        self._load(session, stored - indexed)
+
+    def _load(self, session, problem_ids: Iterable[int]) -> None:
+        missing = sorted(problem_ids)
+        for start in range(0, len(missing), _SYNC_CHUNK):
+            rows = session.execute(
+                select(ProblemIdentification.id, ProblemIdentification.description)
+                .where(ProblemIdentification.id.in_(missing[start:start + _SYNC_CHUNK]))
+            ).all()
+            with self._lock:
+                for problem_id, description in rows:
+                    if problem_id not in self._tokens:
+                        self._add_locked(problem_id, description)
+
+    def candidates(self, tokens: Iterable[str], threshold: float) -> List[int]:
+        """Return ids whose token overlap with ``tokens`` meets ``threshold``.
+
+        Overlap is ``|A & B| / min(|A|, |B|)``, matching
+        :meth:`ProblemAggregator._similar`. Ids are returned in ascending order.
+        """
+        tokens = set(tokens)
+        if not tokens:
+            return []
+        with self._lock:
+            if threshold <= 0:
+                return sorted(pid for pid, t in self._tokens.items() if t)
+            overlap: Counter = Counter()
+            for token in tokens:
+                overlap.update(self._postings.get(token, ()))
+            return sorted(
+                pid for pid, shared in overlap.items()
+                if shared / min(len(tokens), len(self._tokens[pid])) >= threshold
+            )
+
+
+def count_problem_report(session, problem_id: int, day: Optional[date] = None) -> None:
+    """Increment the per-day report counter for a problem (caller commits)."""
+    day = day or datetime.utcnow().date()
+    upsert_increment(
+        session,
+        ProblemReportCount,
+        ["problem_id", "day"],
+        "report_count",
+        [{"problem_id": problem_id, "day": day, "report_count": 1}],
+    )
+
+
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_problem_index(session) -> ProblemIndex:
+    """Return the shared, up-to-date problem index for the session's engine."""
+    engine = session.get_bind()
+    with _indexes_lock:
+        index = _indexes.get(engine)
+        if index is None:
+            index = _indexes[engine] = ProblemIndex()
+    index.sync(session)
+    return index
 
 
 class ProblemAggregator:
@@ -19,15 +210,7 @@ class ProblemAggregator:
 
     @staticmethod
     def _tokenize(text: str) -> set[str]:
-        words = re.findall(r"\w+", text.lower())
-        normalized = []
-        for w in words:
-            if w.endswith("es"):
-                w = w[:-2]
-            elif w.endswith("s"):
-                w = w[:-1]
-            normalized.append(w)
-        return set(normalized)
+        return _tokenize(text)
 
     def _similar(self, a: str, b: str) -> bool:
         ta, tb = self._tokenize(a), self._tokenize(b)
@@ -43,34 +226,72 @@ class ProblemAggregator:
         """Record a problem report, incrementing frequency if similar exists."""
         session = SessionLocal()
         try:
-            for problem in session.query(ProblemIdentification).all():
+            index = get_problem_index(session)
+            tokens = self._tokenize(description)
+            for problem_id in index.candidates(tokens, self.similarity_threshold):
+                problem = session.get(ProblemIdentification, problem_id)
+                if problem is None:
+                    index.remove(problem_id)
+                    continue
                 if self._similar(problem.description, description):
                     problem.frequency_count += 1
                     problem.last_reported = datetime.utcnow()
+                    count_problem_report(session, problem.id)
                     session.commit()
                     return problem
+                # Description changed since it was indexed
+                index.add(problem.id, problem.description)
             new_problem = ProblemIdentification(description=description)
             session.add(new_problem)
+            session.flush()
+            count_problem_report(session, new_problem.id)
             session.commit()
+            index.add(new_problem.id, description)
             return new_problem
         finally:
             session.close()
 
-    def trending_problems(self, within_days: int = 7, min_reports: int = 3) -> List[Tuple[int, str, int]]:
-        """Return problems reported frequently in recent period."""
+    def trending_problems(
+        self,
+        within_days: int = 7,
+        min_reports: float = 3,
+        half_life_days: Optional[float] = None,
+    ) -> List[Tuple[int, str, int]]:
+        """Return problems reported frequently in recent period.
+
+        Sums the per-day report counters over the last ``within_days`` days in
+        a single query and keeps problems with at least ``min_reports``. With
+        ``half_life_days`` each day's count is weighted by
+        ``0.5 ** (age / half_life_days)`` before applying the threshold.
+        Returns ``(id, description, reports_in_window)`` ordered by score.
+        """
         session = SessionLocal()
         try:
-            cutoff = datetime.utcnow() - timedelta(days=within_days)
-            problems = (
-                session.query(ProblemIdentification)
-                .filter(ProblemIdentification.last_reported >= cutoff)
-                .all()
+            today = datetime.utcnow().date()
+            cutoff = (datetime.utcnow() - timedelta(days=within_days)).date()
+            counts = ProblemReportCount
+            reports = func.sum(counts.report_count)
+            if half_life_days:
+                # One CASE branch per day in the window keeps the decay portable
+                weights = {
+                    today - timedelta(days=age): 0.5 ** (age / half_life_days)
+                    for age in range((today - cutoff).days + 1)
+                }
+                weight = case(
+                    *[(counts.day == day, literal(w)) for day, w in weights.items()],
+                    else_=literal(0.0),
+                )
+                score = func.sum(counts.report_count * weight)
+            else:
+                score = reports
+            rows = session.execute(
+                select(ProblemIdentification.id, ProblemIdentification.description, reports)
+                .join(counts, counts.problem_id == ProblemIdentification.id)
+                .where(counts.day >= cutoff)
+                .group_by(ProblemIdentification.id, ProblemIdentification.description)
+                .having(score >= min_reports)
+                .order_by(score.desc(), ProblemIdentification.id)
             )
-            results: List[Tuple[int, str, int]] = []
-            for p in problems:
-                if p.frequency_count >= min_reports:
-                    results.append((p.id, p.description, p.frequency_count))
-            return results
+            return [(pid, desc, int(n)) for pid, desc, n in rows]
         finally:
             session.close()
-
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 """Sentiment analysis utilities using NLTK's VADER."""
 
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
 from nltk.sentiment import SentimentIntensityAnalyzer
 from nltk import download
 
@@ -19,3 +22,38 @@ def analyze_sentiment(text: str) -> float:
         return 0.0
     scores = _analyzer.polarity_scores(text)
     return scores["compound"]
+
+
+def _init_worker() -> None:
+    """Give each pool worker its own analyzer instead of a pickled copy."""
+    global _analyzer
+    _analyzer = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts: Sequence[str]) -> List[float]:
+    return [analyze_sentiment(text) for text in texts]
+
+
+def sentiment_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return a process pool whose workers each hold a VADER analyzer."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def analyze_sentiment_batch(
+    texts: Sequence[str],
+    executor: Optional[Executor] = None,
+    chunk_size: int = 256,
+) -> List[float]:
+    """Return compound scores for ``texts`` in input order.
+
+    Texts are split into chunks of ``chunk_size`` and scored on ``executor``
+    (see :func:`sentiment_pool`). Without an executor, or when everything
+    fits in one chunk, scoring runs in the calling process.
+    """
+    if executor is None or len(texts) <= chunk_size:
+        return _score_chunk(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    scores: List[float] = []
+    for chunk_scores in executor.map(_score_chunk, chunks):
+        scores.extend(chunk_scores)
+    return scores
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import atexit
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
 import os
+from typing import Optional, Tuple
 
-from flask import Flask, jsonify, request, render_template
-import asyncio
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context
+import click
+import concurrent.futures
 from flask_cors import CORS
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
 
 # SQLAlchemy setup
@@ -20,6 +23,10 @@ Base = declarative_base()
 
 # Import models so they are registered with SQLAlchemy's metadata
 from . import models  # noqa: F401
+from . import config_registry, insights, reporting
+
+# Drop cached dashboard snapshots when problems/solutions/feedback are written
+insights.watch_sessions(SessionLocal)
 
 
 def load_config(config_path: Path) -> dict:
@@ -28,6 +35,30 @@ def load_config(config_path: Path) -> dict:
         return json.load(f)
 
 
+def validate_time_allocation(data: dict, config: config_registry.ConfigSnapshot) -> str | None:
+    """Return an error message if ``data`` is not a valid allocation, else None."""
+    # Validate required fields
+    if not isinstance(data, dict) or not data.get("group_id") or not data.get("activities"):
+        return "Missing required fields: group_id, activities"
+    if not isinstance(data["activities"], dict):
+        return "Invalid activities: must be an object of activity to hours"
+
+    # Validate group_id
+    if data["group_id"] not in config.groups:
+        return "Invalid group_id"
+
+    # Validate activities exist in config
+    for activity in data["activities"].keys():
+        if activity not in config.activities:
+            return f"Invalid activity: {activity}"
+
+    # Validate that hours are positive numbers
+    for activity, hours in data["activities"].items():
+        if not isinstance(hours, (int, float)) or hours < 0:
+            return f"Invalid hours for {activity}: must be a positive number"
+    return None
+
+
 def init_db(database_url: str):
     """Initialize the database engine and session factory."""
     global engine
@@ -38,6 +69,22 @@ def init_db(database_url: str):
     Base.metadata.create_all(bind=engine)
 
 
+def _date_range_args(args) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Parse the optional ISO ``start_date``/``end_date`` query arguments.
+
+    Raises ``ValueError("Invalid start_date")`` (or ``end_date``) when a
+    value is not an ISO date.
+    """
+    bounds = []
+    for name in ("start_date", "end_date"):
+        value = args.get(name)
+        try:
+            bounds.append(datetime.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f"Invalid {name}") from None
+    return bounds[0], bounds[1]
+
+
 def create_app(config_object: dict | None = None) -> Flask:
     """Create and configure the Flask application."""
     app = Flask(__name__, template_folder='../../templates')
@@ -51,17 +98,54 @@ def create_app(config_object: dict | None = None) -> Flask:
         Path(__file__).resolve().parents[2] / "config" / "dcri_config.json.example"
     )
     app.config.setdefault("DCRI_CONFIG_PATH", default_config_path)
+    app.config.setdefault("MAX_ALLOCATION_BATCH_SIZE", 1000)
+    app.config.setdefault(
+        "INGEST_QUEUE_ENABLED", os.getenv("INGEST_QUEUE_ENABLED", "false").lower() == "true"
+    )
+    app.config.setdefault("INGEST_BATCH_SIZE", int(os.getenv("INGEST_BATCH_SIZE", "100")))
+    app.config.setdefault("INGEST_MAX_DELAY", float(os.getenv("INGEST_MAX_DELAY", "0.5")))
+    app.config.setdefault("CHATBOT_RESPONSE_TIMEOUT", float(os.getenv("CHATBOT_RESPONSE_TIMEOUT", "30")))
+    app.config.setdefault("CHATBOT_MAX_CONVERSATIONS", int(os.getenv("CHATBOT_MAX_CONVERSATIONS", "10000")))
+    app.config.setdefault("CHATBOT_CONVERSATION_TTL", float(os.getenv("CHATBOT_CONVERSATION_TTL", "3600")))
+    app.config.setdefault("CHATBOT_STATE_BACKEND", os.getenv("CHATBOT_STATE_BACKEND", "memory"))
+    app.config.setdefault("CHATBOT_DB_WORKERS", int(os.getenv("CHATBOT_DB_WORKERS", "8")))
+    app.config.setdefault("CHATBOT_MAX_IN_FLIGHT", int(os.getenv("CHATBOT_MAX_IN_FLIGHT", "100")))
+    app.config.setdefault("INSIGHTS_CACHE_TTL", float(os.getenv("INSIGHTS_CACHE_TTL", "30")))
 
     if config_object:
         app.config.update(config_object)
 
     init_db(app.config["DATABASE_URL"])
 
+    # Optional write-behind queue for submissions (see ingest.py for durability notes)
+    ingest_queue = None
+    if app.config["INGEST_QUEUE_ENABLED"]:
+        from .ingest import IngestionQueue
+
+        ingest_queue = IngestionQueue(
+            batch_size=app.config["INGEST_BATCH_SIZE"],
+            max_delay=app.config["INGEST_MAX_DELAY"],
+        )
+        atexit.register(ingest_queue.close)
+    app.extensions["ingest_queue"] = ingest_queue
+    app.extensions["insights_cache"] = insights.InsightsCache(app.config["INSIGHTS_CACHE_TTL"])
+
     # Initialize chatbot service with platform adapters
     from .chatbot.base import BaseChatbotService
     from .chatbot.adapters import TeamsAdapter, WebChatAdapter, SlackAdapter
-
-    chatbot_service = BaseChatbotService()
+    from .chatbot.runtime import EventLoopThread
+    from .chatbot.state import create_state_backend
+
+    # Use the "database" backend when several chatbot workers serve the same users
+    chatbot_service = BaseChatbotService(
+        state_backend=create_state_backend(
+            app.config["CHATBOT_STATE_BACKEND"],
+            max_states=app.config["CHATBOT_MAX_CONVERSATIONS"],
+            idle_ttl=app.config["CHATBOT_CONVERSATION_TTL"],
+        ),
+        db_workers=app.config["CHATBOT_DB_WORKERS"],
+        max_in_flight=app.config["CHATBOT_MAX_IN_FLIGHT"],
+    )
     enabled = os.getenv("ENABLED_CHATBOT_PLATFORMS", "web,teams")
     platforms = {p.strip().lower() for p in enabled.split(',') if p.strip()}
 
@@ -72,11 +156,18 @@ def create_app(config_object: dict | None = None) -> Flask:
     if "slack" in platforms:
         chatbot_service.register_adapter("slack", SlackAdapter())
 
+    # Chatbot coroutines from every request run on one long-lived loop
+    chatbot_loop = EventLoopThread()
+    atexit.register(chatbot_loop.close)
+    atexit.register(chatbot_service.close)
+    app.extensions["chatbot_service"] = chatbot_service
+    app.extensions["chatbot_loop"] = chatbot_loop
+
     @app.route("/api/config", methods=["GET"])
     def get_config() -> jsonify:
         """Return configuration data loaded from the JSON file."""
-        config_data = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
-        return jsonify(config_data)
+        config = config_registry.get_config(app.config["DCRI_CONFIG_PATH"])
+        return jsonify(dict(config.raw))
 
     @app.route("/api/submit", methods=["POST"])
     def submit_activity() -> jsonify:
@@ -87,35 +178,33 @@ def create_app(config_object: dict | None = None) -> Flask:
         if not all(data.get(f) for f in required):
             return jsonify({"error": "Missing required fields"}), 400
 
-        config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
-        valid_groups = {g["id"] for g in config.get("groups", [])}
-        if data["group_id"] not in valid_groups:
+        config = config_registry.get_config(app.config["DCRI_CONFIG_PATH"])
+        if data["group_id"] not in config.groups:
             return jsonify({"error": "Invalid group_id"}), 400
 
-        activity_map = {
-            a["category"]: set(a.get("sub_activities", []))
-            for a in config.get("activities", [])
-        }
-        if data["activity"] not in activity_map:
+        if data["activity"] not in config.activities:
             return jsonify({"error": "Invalid activity"}), 400
 
-        sub_acts = activity_map[data["activity"]]
+        sub_acts = config.activities[data["activity"]]
         if sub_acts and data["sub_activity"] not in sub_acts:
             return jsonify({"error": "Invalid sub_activity"}), 400
 
+        feedback_text = None
+        if config.enable_free_text_feedback:
+            feedback_text = data.get("feedback")
+
+        log_entry = models.ActivityLog(
+            group_id=data["group_id"],
+            activity=data["activity"],
+            sub_activity=data["sub_activity"],
+            hours_work=data.get("hours_work"),
+            feedback=feedback_text,
+        )
+        if ingest_queue is not None and ingest_queue.submit(log_entry):
+            return jsonify({"status": "accepted"}), 202
+
         session = SessionLocal()
         try:
-            feedback_text = None
-            if config.get("enableFreeTextFeedback"):
-                feedback_text = data.get("feedback")
-
-            log_entry = models.ActivityLog(
-                group_id=data["group_id"],
-                activity=data["activity"],
-                sub_activity=data["sub_activity"],
-                hours_work=data.get("hours_work"),
-                feedback=feedback_text,
-            )
             session.add(log_entry)
             session.commit()
             return jsonify({"status": "success", "id": log_entry.id})
@@ -128,58 +217,27 @@ def create_app(config_object: dict | None = None) -> Flask:
     @app.route("/api/results", methods=["GET"])
     def get_results() -> jsonify:
         """Return aggregated activity data by group and activity."""
+        # Optional filters
+        group_id = request.args.get("group_id")
+        try:
+            start_dt, end_dt = _date_range_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         session = SessionLocal()
         try:
-            # First try TimeAllocation entries (new format)
-            time_query = session.query(models.TimeAllocation)
-            
-            # Optional filters
-            group_id = request.args.get("group_id")
-            start_date = request.args.get("start_date")
-            end_date = request.args.get("end_date")
-
-            if group_id:
-                time_query = time_query.filter(models.TimeAllocation.group_id == group_id)
-
-            if start_date:
-                try:
-                    start_dt = datetime.fromisoformat(start_date)
-                    time_query = time_query.filter(models.TimeAllocation.timestamp >= start_dt)
-                except ValueError:
-                    return jsonify({"error": "Invalid start_date"}), 400
-
-            if end_date:
-                try:
-                    end_dt = datetime.fromisoformat(end_date)
-                    time_query = time_query.filter(models.TimeAllocation.timestamp <= end_dt)
-                except ValueError:
-                    return jsonify({"error": "Invalid end_date"}), 400
-
-            time_allocations = time_query.all()
-            
-            if time_allocations:
-                # Handle TimeAllocation format (hours-based)
-                group_activity_totals = {}
+            # First try TimeAllocation entries (new format), read from daily rollups
+            activity_totals = reporting.rollup_activity_totals(session, group_id, start_dt, end_dt)
+
+            if activity_totals or reporting.has_time_allocations(session, group_id, start_dt, end_dt):
+                # Track total hours per group for percentage calculation
                 group_totals = {}
-                
-                for allocation in time_allocations:
-                    group_id_val = allocation.group_id
-                    activities = allocation.activities
-                    
-                    # Track total hours per group for percentage calculation
-                    if group_id_val not in group_totals:
-                        group_totals[group_id_val] = 0
-                    group_totals[group_id_val] += sum(activities.values())
-                        
-                    for activity, hours in activities.items():
-                        key = (group_id_val, activity)
-                        if key not in group_activity_totals:
-                            group_activity_totals[key] = 0
-                        group_activity_totals[key] += hours
+                for group_id_val, _activity, total_hours in activity_totals:
+                    group_totals[group_id_val] = group_totals.get(group_id_val, 0) + total_hours
 
                 # Convert to percentages for dashboard display
                 results = []
-                for (group_id_val, activity), total_hours in group_activity_totals.items():
+                for group_id_val, activity, total_hours in activity_totals:
                     group_total_hours = group_totals[group_id_val]
                     percentage = (total_hours / group_total_hours * 100) if group_total_hours > 0 else 0
                     results.append({
@@ -188,51 +246,18 @@ def create_app(config_object: dict | None = None) -> Flask:
                         "count": percentage,  # Convert hours to percentage for display
                         "total_hours": total_hours,  # Include raw hours for reference
                     })
-                    
-                return jsonify(results)
-            
-            else:
-                # Fall back to ActivityLog entries (legacy format)
-                activity_query = session.query(models.ActivityLog)
-                
-                if group_id:
-                    activity_query = activity_query.filter(models.ActivityLog.group_id == group_id)
-
-                if start_date:
-                    try:
-                        start_dt = datetime.fromisoformat(start_date)
-                        activity_query = activity_query.filter(models.ActivityLog.timestamp >= start_dt)
-                    except ValueError:
-                        return jsonify({"error": "Invalid start_date"}), 400
-
-                if end_date:
-                    try:
-                        end_dt = datetime.fromisoformat(end_date)
-                        activity_query = activity_query.filter(models.ActivityLog.timestamp <= end_dt)
-                    except ValueError:
-                        return jsonify({"error": "Invalid end_date"}), 400
-
-                activity_logs = activity_query.all()
-                
-                # Aggregate activity logs by group and activity
-                group_activity_counts = {}
-                for log in activity_logs:
-                    key = (log.group_id, log.activity)
-                    if key not in group_activity_counts:
-                        group_activity_counts[key] = 0
-                    group_activity_counts[key] += 1
-
-                # Format results
-                results = []
-                for (group_id_val, activity), count in group_activity_counts.items():
-                    results.append({
-                        "group_id": group_id_val,
-                        "activity": activity,
-                        "count": count
-                    })
 
                 return jsonify(results)
-                
+
+            # Fall back to ActivityLog entries (legacy format)
+            results = [
+                {"group_id": group_id_val, "activity": activity, "count": count}
+                for group_id_val, activity, count in reporting.activity_log_counts(
+                    session, group_id, start_dt, end_dt
+                )
+            ]
+            return jsonify(results)
+
         except Exception as e:  # pragma: no cover - unexpected DB errors
             print(f"Error in get_results: {e}")
             return jsonify({"error": "Server error"}), 500
@@ -244,35 +269,23 @@ def create_app(config_object: dict | None = None) -> Flask:
         """Receive and validate a comprehensive time allocation submission."""
         data = request.get_json(silent=True) or {}
 
-        # Validate required fields
-        if not data.get("group_id") or not data.get("activities"):
-            return jsonify({"error": "Missing required fields: group_id, activities"}), 400
-
-        # Validate group_id
-        config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
-        valid_groups = {g["id"] for g in config.get("groups", [])}
-        if data["group_id"] not in valid_groups:
-            return jsonify({"error": "Invalid group_id"}), 400
-
-        # Validate activities exist in config
-        valid_activities = {a["category"] for a in config.get("activities", [])}
-        for activity in data["activities"].keys():
-            if activity not in valid_activities:
-                return jsonify({"error": f"Invalid activity: {activity}"}), 400
+        config = config_registry.get_config(app.config["DCRI_CONFIG_PATH"])
+        error = validate_time_allocation(data, config)
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Validate that hours are positive numbers
-        for activity, hours in data["activities"].items():
-            if not isinstance(hours, (int, float)) or hours < 0:
-                return jsonify({"error": f"Invalid hours for {activity}: must be a positive number"}), 400
+        allocation_entry = models.TimeAllocation(
+            group_id=data["group_id"],
+            activities=data["activities"],
+            feedback=data.get("feedback"),
+        )
+        if ingest_queue is not None and ingest_queue.submit(allocation_entry):
+            return jsonify({"status": "accepted"}), 202
 
         session = SessionLocal()
         try:
-            allocation_entry = models.TimeAllocation(
-                group_id=data["group_id"],
-                activities=data["activities"],
-                feedback=data.get("feedback"),
-            )
             session.add(allocation_entry)
+            reporting.record_new_allocations(session, [allocation_entry])
             session.commit()
             return jsonify({"status": "success", "id": allocation_entry.id})
         except Exception as e:  # pragma: no cover
@@ -282,6 +295,90 @@ def create_app(config_object: dict | None = None) -> Flask:
         finally:
             session.close()
 
+    @app.route("/api/submit-allocation/batch", methods=["POST"])
+    def submit_time_allocation_batch() -> jsonify:
+        """Validate and insert many time allocations in a single transaction.
+
+        Accepts a JSON array of allocations (or ``{"allocations": [...]}``).
+        Valid items are inserted together; each item gets its own status.
+        """
+        data = request.get_json(silent=True)
+        items = data.get("allocations") if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Expected a non-empty array of allocations"}), 400
+
+        max_items = app.config["MAX_ALLOCATION_BATCH_SIZE"]
+        if len(items) > max_items:
+            return jsonify({"error": f"Batch too large: at most {max_items} allocations"}), 400
+
+        config = config_registry.get_config(app.config["DCRI_CONFIG_PATH"])
+        results = []
+        pending = []
+        for index, item in enumerate(items):
+            error = validate_time_allocation(item, config)
+            if error:
+                results.append({"index": index, "status": "error", "error": error})
+                continue
+            result = {"index": index, "status": "success"}
+            entry = models.TimeAllocation(
+                group_id=item["group_id"],
+                activities=item["activities"],
+                feedback=item.get("feedback"),
+            )
+            results.append(result)
+            pending.append((result, entry))
+
+        if not pending:
+            return jsonify({"status": "error", "inserted": 0, "failed": len(items), "results": results}), 400
+
+        session = SessionLocal()
+        try:
+            entries = [entry for _result, entry in pending]
+            session.add_all(entries)
+            reporting.record_new_allocations(session, entries)
+            for result, entry in pending:
+                result["id"] = entry.id
+            session.commit()
+        except Exception as e:  # pragma: no cover
+            session.rollback()
+            print(f"Database error: {e}")
+            return jsonify({"error": "Server error"}), 500
+        finally:
+            session.close()
+
+        return jsonify({
+            "status": "success" if len(pending) == len(items) else "partial",
+            "inserted": len(pending),
+            "failed": len(items) - len(pending),
+            "results": results,
+        })
+
+    @app.route("/api/export/time-allocations", methods=["GET"])
+    def export_time_allocations_stream() -> Response:
+        """Stream time allocations as NDJSON (default) or CSV."""
+        from .data_migration import stream_time_allocations_csv, stream_time_allocations_ndjson
+
+        export_format = request.args.get("format", "ndjson").lower()
+        if export_format not in {"ndjson", "csv"}:
+            return jsonify({"error": "Invalid format: use ndjson or csv"}), 400
+
+        group_id = request.args.get("group_id")
+        try:
+            start_dt, end_dt = _date_range_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if export_format == "csv":
+            body = stream_time_allocations_csv(group_id, start_dt, end_dt)
+            mimetype = "text/csv"
+        else:
+            body = stream_time_allocations_ndjson(group_id, start_dt, end_dt)
+            mimetype = "application/x-ndjson"
+
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename=time_allocations.{export_format}"
+        return response
+
     @app.route("/health")
     def health() -> dict:
         return {"status": "ok"}
@@ -310,20 +407,26 @@ def create_app(config_object: dict | None = None) -> Flask:
         if not data.get("user_id") or not data.get("message"):
             return jsonify({"error": "Missing required fields: user_id, message"}), 400
         
+        from .ai_insights.sentiment import analyze_sentiment
+
+        feedback = models.ChatbotFeedback(
+            user_id=data["user_id"],
+            message_text=data["message"],
+            message_type=data.get("message_type", "general"),
+            sentiment=analyze_sentiment(data["message"]),
+        )
+        # Simple response generation (can be enhanced with chatbot service)
+        response_text = "Thank you for your feedback. I've recorded your message and will analyze it for insights."
+
+        if ingest_queue is not None and ingest_queue.submit(feedback):
+            return jsonify({"status": "accepted", "response": response_text}), 202
+
         session = SessionLocal()
         try:
             # Store the feedback
-            feedback = models.ChatbotFeedback(
-                user_id=data["user_id"],
-                message_text=data["message"],
-                message_type=data.get("message_type", "general")
-            )
             session.add(feedback)
             session.commit()
-            
-            # Simple response generation (can be enhanced with chatbot service)
-            response_text = "Thank you for your feedback. I've recorded your message and will analyze it for insights."
-            
+
             return jsonify({
                 "status": "success",
                 "response": response_text,
@@ -344,7 +447,15 @@ def create_app(config_object: dict | None = None) -> Flask:
             return jsonify({"error": "Unauthorized"}), 401
 
         raw = request.get_json(silent=True) or {}
-        response = asyncio.run(chatbot_service.process_message("teams", raw))
+        try:
+            response = chatbot_loop.run(
+                chatbot_service.process_message("teams", raw),
+                timeout=app.config["CHATBOT_RESPONSE_TIMEOUT"],
+            )
+        except concurrent.futures.TimeoutError:
+            return jsonify({"error": "Timed out processing message"}), 504
+        if response.message_type == "busy":
+            return jsonify({"text": response.text}), 503, {"Retry-After": "1"}
         return jsonify({"text": response.text})
 
     @app.route("/api/problems", methods=["GET"])
@@ -437,6 +548,10 @@ def create_app(config_object: dict | None = None) -> Flask:
                 problem.description = data["description"]
 
             session.commit()
+            if "description" in data:
+                from .ai_insights import get_problem_index
+
+                get_problem_index(session).add(problem_id, data["description"])
             return jsonify({"status": "success"})
         except Exception as e:  # pragma: no cover
             session.rollback()
@@ -557,108 +672,8 @@ def create_app(config_object: dict | None = None) -> Flask:
         """Return dashboard insights and analytics."""
         session = SessionLocal()
         try:
-            # Get problem statistics
-            total_problems = session.query(models.ProblemIdentification).count()
-            active_problems = session.query(models.ProblemIdentification).filter_by(status="identified").count()
-            resolved_problems = session.query(models.ProblemIdentification).filter_by(status="resolved").count()
-
-            # Get solution statistics
-            total_solutions = session.query(models.SolutionSuggestion).count()
-            implemented_solutions = session.query(models.SolutionSuggestion).filter_by(status="implemented").count()
-
-            # Solution pipeline counts
-            pipeline_counts = dict(
-                session.query(models.SolutionSuggestion.status, func.count(models.SolutionSuggestion.id))
-                .group_by(models.SolutionSuggestion.status)
-                .all()
-            )
-
-            # Get recent feedback count
-            recent_feedback = session.query(models.ChatbotFeedback).filter(
-                models.ChatbotFeedback.processed == False
-            ).count()
-
-            # Get top problems by frequency
-            top_problems = session.query(models.ProblemIdentification).order_by(
-                models.ProblemIdentification.frequency_count.desc()
-            ).limit(5).all()
-
-            # Trending problems (last 7 days, min 2 reports)
-            from .ai_insights import ProblemAggregator, analyze_sentiment
-
-            aggregator = ProblemAggregator()
-            trending = aggregator.trending_problems(within_days=7, min_reports=2)
-
-            # Champion counts from success stories
-            champion_rows = (
-                session.query(models.ChatbotFeedback.user_id, func.count(models.ChatbotFeedback.id))
-                .filter(models.ChatbotFeedback.message_type == "success_story")
-                .group_by(models.ChatbotFeedback.user_id)
-                .order_by(func.count(models.ChatbotFeedback.id).desc())
-                .limit(5)
-                .all()
-            )
-            champions = [
-                {"user_id": uid, "count": cnt}
-                for uid, cnt in champion_rows
-            ]
-
-            # ROI statistics for implemented solutions
-            implemented = session.query(models.SolutionSuggestion).filter_by(status="implemented").all()
-            total_savings = sum(s.actual_savings or 0 for s in implemented)
-            avg_roi = 0.0
-            if implemented:
-                roi_values = [s.roi_score for s in implemented if s.roi_score is not None]
-                if roi_values:
-                    avg_roi = sum(roi_values) / len(roi_values)
-
-            # Sentiment analysis for recent feedback (7 days)
-            cutoff = datetime.utcnow() - timedelta(days=7)
-            recent_messages = (
-                session.query(models.ChatbotFeedback.message_text)
-                .filter(models.ChatbotFeedback.timestamp >= cutoff)
-                .all()
-            )
-            sentiments = [analyze_sentiment(m[0]) for m in recent_messages]
-            avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
-
-            return jsonify({
-                "problem_stats": {
-                    "total": total_problems,
-                    "active": active_problems,
-                    "resolved": resolved_problems,
-                },
-                "solution_stats": {
-                    "total": total_solutions,
-                    "implemented": implemented_solutions,
-                    "pipeline": pipeline_counts,
-                },
-                "feedback_stats": {
-                    "unprocessed": recent_feedback,
-                    "sentiment": avg_sentiment,
-                },
-                "top_problems": [
-                    {
-                        "id": p.id,
-                        "description": p.description[:100] + "..." if len(p.description) > 100 else p.description,
-                        "frequency": p.frequency_count,
-                    }
-                    for p in top_problems
-                ],
-                "trending_problems": [
-                    {
-                        "id": pid,
-                        "description": desc,
-                        "frequency": freq,
-                    }
-                    for pid, desc, freq in trending
-                ],
-                "champions": champions,
-                "roi": {
-                    "total_savings": total_savings,
-                    "average_roi": avg_roi,
-                },
-            })
+            payload = app.extensions["insights_cache"].get(lambda: insights.build_insights(session))
+            return jsonify(payload)
         except Exception as e:
             print(f"Error retrieving insights: {e}")
             return jsonify({"error": "Server error"}), 500
@@ -744,6 +759,23 @@ def create_app(config_object: dict | None = None) -> Flask:
         finally:
             session.close()
 
+    @app.route("/api/admin/ingest-stats", methods=["GET"])
+    def ingest_stats() -> jsonify:
+        """Return write-behind queue depth and commit latency metrics."""
+        if ingest_queue is None:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, **ingest_queue.stats()})
+
+    @app.route("/api/admin/chatbot-stats", methods=["GET"])
+    def chatbot_stats() -> jsonify:
+        """Return conversation state, load and per-stage timing metrics."""
+        return jsonify({
+            "state_backend": app.config["CHATBOT_STATE_BACKEND"],
+            "conversations": chatbot_service.conversation_states.stats(),
+            "stages": chatbot_service.timings.stats(),
+            "load": chatbot_service.load_stats(),
+        })
+
     @app.route("/api/jira-webhook", methods=["POST"])
     def jira_webhook() -> jsonify:
         """Receive Jira status updates via webhook."""
@@ -771,11 +803,56 @@ def create_app(config_object: dict | None = None) -> Flask:
             session.close()
 
     @app.cli.command("run-retention")
-    def run_retention_cli() -> None:
+    @click.option("--batch-size", default=500, show_default=True, help="User/type pairs per transaction.")
+    def run_retention_cli(batch_size: int) -> None:
         """Run data retention cleanup tasks."""
         from .data_retention import run_retention_tasks
 
-        run_retention_tasks()
+        run_retention_tasks(batch_size=batch_size)
         print("Retention tasks completed")
 
+    @app.cli.command("migrate-activity-logs")
+    @click.option("--chunk-size", default=10000, show_default=True, help="ActivityLog ids per transaction.")
+    @click.option(
+        "--legacy-watermark",
+        type=int,
+        default=None,
+        help="Highest ActivityLog id already converted by the pre-checkpoint migration (first run only).",
+    )
+    def migrate_activity_logs_cli(chunk_size: int, legacy_watermark: int | None) -> None:
+        """Convert legacy ActivityLog rows into TimeAllocation entries."""
+        from .data_migration import migrate_activity_logs_to_time_allocations
+
+        created = migrate_activity_logs_to_time_allocations(chunk_size=chunk_size, legacy_watermark=legacy_watermark)
+        print(f"Created {created} time allocation entries")
+
+    @app.cli.command("backfill-sentiment")
+    @click.option("--batch-size", default=1000, show_default=True, help="Feedback rows per transaction.")
+    @click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Scoring processes.")
+    def backfill_sentiment_cli(batch_size: int, workers: int) -> None:
+        """Score stored chatbot feedback that has no sentiment yet."""
+        import time
+
+        from .data_migration import backfill_feedback_sentiment
+
+        started = time.perf_counter()
+        scored = backfill_feedback_sentiment(batch_size=batch_size, workers=workers)
+        elapsed = time.perf_counter() - started
+        rate = scored / elapsed if elapsed > 0 else 0.0
+        print(f"Scored {scored} feedback messages in {elapsed:.1f}s ({rate:.0f} messages/s, {workers} workers)")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_cli() -> None:
+        """Recompute the daily allocation rollup table from scratch."""
+        session = SessionLocal()
+        try:
+            count = reporting.rebuild_allocation_rollups(session)
+            session.commit()
+            print(f"Rebuilt {count} allocation rollup rows")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     return app
@@ -5,9 +5,25 @@ from __future__ import annotations
 from typing import Dict, Any, Optional
 from datetime import datetime
 import os
-import requests
+import threading
 
 from .base import ChatbotPlatformAdapter, ChatMessage, ChatResponse
+from .http_client import AsyncHTTPClient
+
+_slack_client: Optional[AsyncHTTPClient] = None
+_slack_client_lock = threading.Lock()
+
+
+def get_slack_client() -> AsyncHTTPClient:
+    """Return the HTTP client shared by every SlackAdapter in the process."""
+    global _slack_client
+    with _slack_client_lock:
+        if _slack_client is None:
+            _slack_client = AsyncHTTPClient(
+                max_connections=int(os.getenv("SLACK_MAX_CONNECTIONS", "10")),
+                max_retries=int(os.getenv("SLACK_MAX_RETRIES", "3")),
+            )
+        return _slack_client
 
 
 class WebChatAdapter(ChatbotPlatformAdapter):
@@ -75,13 +91,21 @@ class TeamsAdapter(ChatbotPlatformAdapter):
 class SlackAdapter(ChatbotPlatformAdapter):
     """Adapter for Slack integration."""
 
-    def __init__(self, bot_token: str | None = None, default_channel: str | None = None) -> None:
+    def __init__(
+        self,
+        bot_token: str | None = None,
+        default_channel: str | None = None,
+        api_url: str | None = None,
+        http_client: AsyncHTTPClient | None = None,
+    ) -> None:
         """Initialize Slack adapter from environment settings."""
         self.bot_token = bot_token or os.getenv("SLACK_BOT_TOKEN")
         if default_channel is not None:
             self.default_channel = default_channel
         else:
             self.default_channel = os.getenv("SLACK_DEFAULT_CHANNEL", "#general")
+        self.api_url = (api_url or os.getenv("SLACK_API_URL", "https://slack.com/api")).rstrip("/")
+        self.http_client = http_client or get_slack_client()
 
     async def send_message(self, user_id: str, response: ChatResponse) -> bool:
         """Send message to Slack user."""
@@ -96,12 +120,12 @@ class SlackAdapter(ChatbotPlatformAdapter):
             channel = user_id
 
         payload = {"channel": channel, "text": response.text}
-        url = "https://slack.com/api/chat.postMessage"
+        url = f"{self.api_url}/chat.postMessage"
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json; charset=utf-8",
         }
-        resp = requests.post(url, headers=headers, json=payload, timeout=10)
+        resp = await self.http_client.post_json(url, payload, headers=headers)
         if resp.status_code != 200:
             return False
         data = resp.json()
@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, Optional, List, TypeVar
 from dataclasses import dataclass
 from datetime import datetime
+import asyncio
 import json
 import logging
+import time
 
 from ..models import (
     ChatbotFeedback,
@@ -15,7 +19,16 @@ from ..models import (
     ProblemIdentification,
 )
 from ..app import SessionLocal
+from ..ai_insights.sentiment import analyze_sentiment
+from ..reporting import record_new_allocations
+from .classifier import MessageClassifier
 from .nlp_processor import NLPProcessor
+from .runtime import KeyedLock, StageTimer
+from .state import ConversationState, ConversationStateBackend, MemoryStateBackend, StaleConversationState
+
+T = TypeVar("T")
+
+BUSY_MESSAGE = "I'm handling a lot of messages right now. Please try again in a moment."
 
 
 @dataclass
@@ -57,38 +70,34 @@ class ChatbotPlatformAdapter(ABC):
         pass
 
 
-class ConversationState:
-    """Manages conversation state for individual users."""
-    
-    def __init__(self, user_id: str):
-        self.user_id = user_id
-        self.current_flow: Optional[str] = None
-        self.context: Dict[str, Any] = {}
-        self.last_activity: datetime = datetime.utcnow()
-    
-    def update_context(self, key: str, value: Any):
-        """Update conversation context."""
-        self.context[key] = value
-        self.last_activity = datetime.utcnow()
-    
-    def get_context(self, key: str, default=None):
-        """Get value from conversation context."""
-        return self.context.get(key, default)
-    
-    def reset(self):
-        """Reset conversation state."""
-        self.current_flow = None
-        self.context = {}
-        self.last_activity = datetime.utcnow()
-
-
 class BaseChatbotService:
     """Core chatbot service with platform abstraction."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_conversation_states: int = 10000,
+        conversation_idle_ttl: float = 3600.0,
+        state_backend: Optional[ConversationStateBackend] = None,
+        classifier: Optional[MessageClassifier] = None,
+        db_workers: int = 8,
+        max_in_flight: int = 100,
+    ):
         self.adapters: Dict[str, ChatbotPlatformAdapter] = {}
-        self.conversation_states: Dict[str, ConversationState] = {}
+        self.conversation_states = state_backend or MemoryStateBackend(
+            max_states=max_conversation_states, idle_ttl=conversation_idle_ttl
+        )
         self.nlp = NLPProcessor()
+        self.classifier = classifier or MessageClassifier()
+        # Blocking database work runs here so the event loop only awaits it;
+        # size it to the database connection pool
+        self.db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="chatbot-db")
+        self.timings = StageTimer()
+        # Messages from one user are handled in arrival order, different
+        # users in parallel; beyond max_in_flight new messages get BUSY_MESSAGE
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._rejected = 0
+        self._user_locks = KeyedLock()
         self.logger = logging.getLogger("chatbot")
         if not self.logger.handlers:
             handler = logging.StreamHandler()
@@ -106,74 +115,142 @@ class BaseChatbotService:
     def register_adapter(self, platform: str, adapter: ChatbotPlatformAdapter):
         """Register a platform adapter."""
         self.adapters[platform] = adapter
+
+    def load_stats(self) -> Dict[str, int]:
+        """Return in-flight message counts and how many were turned away."""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "active_users": len(self._user_locks),
+            "rejected": self._rejected,
+        }
+
+    def close(self) -> None:
+        """Stop the database thread pool once queued writes have finished."""
+        self.db_executor.shutdown(wait=True)
     
     def get_conversation_state(self, user_id: str) -> ConversationState:
-        """Get or create conversation state for user."""
-        if user_id not in self.conversation_states:
-            self.conversation_states[user_id] = ConversationState(user_id)
-        return self.conversation_states[user_id]
+        """Get or create conversation state for user.
+
+        Returns a working copy; persist changes with
+        :meth:`save_conversation_state`.
+        """
+        return self.conversation_states.get_or_create(user_id)
+
+    def save_conversation_state(self, state: ConversationState) -> None:
+        """Persist ``state``; raises ``StaleConversationState`` on a conflict."""
+        self.conversation_states.save(state)
     
+    async def run_blocking(self, stage: str, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the database thread pool, timed as ``stage``."""
+        loop = asyncio.get_running_loop()
+        with self.timings.measure(stage):
+            return await loop.run_in_executor(self.db_executor, partial(fn, *args))
+
+    async def _load_state(self, user_id: str) -> ConversationState:
+        if self.conversation_states.blocking:
+            return await self.run_blocking("state_load", self.get_conversation_state, user_id)
+        return self.get_conversation_state(user_id)
+
+    async def _save_state(self, state: ConversationState) -> None:
+        if self.conversation_states.blocking:
+            await self.run_blocking("state_save", self.save_conversation_state, state)
+        else:
+            self.save_conversation_state(state)
+    
+    async def _end_flow(self, state: ConversationState) -> None:
+        """Reset and save ``state`` once a flow's reply is decided.
+
+        The reply reflects work already committed, so a concurrent change to
+        the state is logged instead of replacing the reply with an error.
+        """
+        state.reset()
+        try:
+            await self._save_state(state)
+        except StaleConversationState:
+            self.logger.warning("Conversation state for %s changed concurrently; flow not reset", state.user_id)
+
     async def process_message(self, platform: str, raw_message: Dict[str, Any]) -> Optional[ChatResponse]:
-        """Process incoming message from any platform."""
+        """Process incoming message from any platform.
+
+        Messages from the same user are processed one at a time in the
+        order they arrive, so a multi-turn flow never sees two of its steps
+        at once; messages from different users run concurrently. When
+        ``max_in_flight`` messages are already being processed or queued
+        the message is not processed and a "busy" response is returned.
+        """
         if platform not in self.adapters:
             raise ValueError(f"Unknown platform: {platform}")
 
         adapter = self.adapters[platform]
-        
-        # Authenticate and parse message
-        user_id = await adapter.authenticate_user(raw_message)
-        if not user_id:
-            return ChatResponse("Sorry, I couldn't authenticate your identity.")
 
-        message = await adapter.parse_message(raw_message)
+        if self._in_flight >= self.max_in_flight:
+            self._rejected += 1
+            self.logger.warning("Chatbot busy; rejected message on %s", platform)
+            return ChatResponse(BUSY_MESSAGE, message_type="busy")
+
+        self._in_flight += 1
+        try:
+            with self.timings.measure("total"):
+                # Authenticate and parse message
+                with self.timings.measure("authenticate"):
+                    user_id = await adapter.authenticate_user(raw_message)
+                if not user_id:
+                    return ChatResponse("Sorry, I couldn't authenticate your identity.")
+
+                queued = time.perf_counter()
+                async with self._user_locks.hold(user_id):
+                    self.timings.record("wait_for_user", (time.perf_counter() - queued) * 1000)
+                    return await self._process_user_message(adapter, platform, user_id, raw_message)
+        finally:
+            self._in_flight -= 1
+
+    async def _process_user_message(
+        self, adapter: ChatbotPlatformAdapter, platform: str, user_id: str, raw_message: Dict[str, Any]
+    ) -> ChatResponse:
+        with self.timings.measure("parse"):
+            message = await adapter.parse_message(raw_message)
         self.logger.info("Received message from %s on %s", user_id, platform)
-        
+
         # Store the feedback in database
         await self._store_chatbot_feedback(message)
-        
+
         # Determine message type and route to appropriate handler
-        message_type = self._classify_message(message.text)
+        with self.timings.measure("classify"):
+            message_type = self._classify_message(message.text)
         handler = self.message_handlers.get(message_type, self.message_handlers["general"])
-        
+
         try:
-            response = await handler(message)
+            with self.timings.measure(f"handle.{message_type}"):
+                response = await handler(message)
         except Exception as e:
             self.logger.exception("Handler error")
             response = ChatResponse("Sorry, something went wrong processing your message.")
 
         try:
-            await adapter.send_message(user_id, response)
+            with self.timings.measure("send"):
+                await adapter.send_message(user_id, response)
         except Exception as e:
             self.logger.exception("Send message error")
 
         return response
-    
+
     def _classify_message(self, text: str) -> str:
         """Classify message type based on content analysis."""
-        text_lower = text.lower()
-        
-        # Simple keyword-based classification (can be enhanced with ML)
-        time_keywords = ["spent", "hours", "time", "allocation", "working on", "% on"]
-        problem_keywords = ["problem", "issue", "frustrating", "difficult", "broken", "bug"]
-        success_keywords = ["success", "achievement", "completed", "good", "well", "productive"]
-        
-        if any(keyword in text_lower for keyword in time_keywords):
-            return "time_allocation"
-        elif any(keyword in text_lower for keyword in problem_keywords):
-            return "problem_report"
-        elif any(keyword in text_lower for keyword in success_keywords):
-            return "success_story"
-        else:
-            return "general"
+        return self.classifier.classify(text)
     
     async def _store_chatbot_feedback(self, message: ChatMessage):
         """Store chatbot feedback in database."""
+        await self.run_blocking("store_feedback", self._write_chatbot_feedback, message)
+
+    def _write_chatbot_feedback(self, message: ChatMessage) -> None:
         session = SessionLocal()
         try:
             feedback = ChatbotFeedback(
                 user_id=message.user_id,
                 message_text=message.text,
                 message_type=message.message_type or "general",
+                sentiment=analyze_sentiment(message.text),
                 timestamp=message.timestamp
             )
             session.add(feedback)
@@ -187,11 +264,12 @@ class BaseChatbotService:
     
     async def _handle_time_allocation(self, message: ChatMessage) -> ChatResponse:
         """Handle time allocation related messages."""
-        state = self.get_conversation_state(message.user_id)
+        state = await self._load_state(message.user_id)
         
         # Conversation flow
         if state.current_flow != "time_allocation":
             state.current_flow = "time_allocation"
+            await self._save_state(state)
             return ChatResponse(
                 "I'll help you log your time allocation. Please provide the approximate percentage of time you spent on each activity.",
                 message_type="time_allocation",
@@ -205,34 +283,43 @@ class BaseChatbotService:
                 message_type="time_allocation"
             )
 
-        session = SessionLocal()
         try:
-            entry = TimeAllocation(
-                group_id=message.user_id,
-                activities=allocations
-            )
-            session.add(entry)
-            session.commit()
+            await self.run_blocking("store_time_allocation", self._write_time_allocation, message.user_id, allocations)
             response = ChatResponse(
                 "Thank you for sharing your time allocation. I've recorded this information.",
                 message_type="time_allocation"
             )
         except Exception as e:
-            session.rollback()
             self.logger.exception("Error storing time allocation")
             response = ChatResponse("There was an error recording your allocation.")
         finally:
-            session.close()
-            state.reset()
+            await self._end_flow(state)
 
         return response
+
+    def _write_time_allocation(self, group_id: str, allocations: Dict[str, float]) -> None:
+        session = SessionLocal()
+        try:
+            entry = TimeAllocation(
+                group_id=group_id,
+                activities=allocations
+            )
+            session.add(entry)
+            record_new_allocations(session, [entry])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
     
     async def _handle_problem_report(self, message: ChatMessage) -> ChatResponse:
         """Handle problem reporting messages."""
-        state = self.get_conversation_state(message.user_id)
+        state = await self._load_state(message.user_id)
 
         if state.current_flow != "problem_report":
             state.current_flow = "problem_report"
+            await self._save_state(state)
             return ChatResponse(
                 "I'm sorry to hear you're facing issues. Could you briefly describe the problem?",
                 message_type="problem_report",
@@ -244,7 +331,7 @@ class BaseChatbotService:
         aggregator = ProblemAggregator()
 
         try:
-            problem = aggregator.record_problem(message.text)
+            await self.run_blocking("store_problem_report", aggregator.record_problem, message.text)
             response = ChatResponse(
                 "Thanks, I've logged this problem for review.",
                 message_type="problem_report",
@@ -253,22 +340,23 @@ class BaseChatbotService:
             self.logger.exception("Error storing problem report")
             response = ChatResponse("There was an error recording the problem.")
         finally:
-            state.reset()
+            await self._end_flow(state)
 
         return response
     
     async def _handle_success_story(self, message: ChatMessage) -> ChatResponse:
         """Handle success story messages."""
-        state = self.get_conversation_state(message.user_id)
+        state = await self._load_state(message.user_id)
 
         if state.current_flow != "success_story":
             state.current_flow = "success_story"
+            await self._save_state(state)
             return ChatResponse(
                 "I'd love to hear about your success! Please tell me what went well.",
                 message_type="success_story",
             )
 
-        state.reset()
+        await self._end_flow(state)
         return ChatResponse(
             "Thanks for sharing your success story!",
             message_type="success_story",
@@ -0,0 +1,122 @@
+"""Keyword-based message classifier compiled into a single regex."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Sequence
+
+
+# Category -> keywords/phrases, in tie-break priority order. Keywords match
+# whole words; a trailing ``*`` also matches any word suffix ("bug*" matches
+# "bugs"). Phrases may contain spaces and punctuation ("% on").
+DEFAULT_CLASSIFIER_KEYWORDS: Dict[str, Sequence[str]] = {
+    "time_allocation": ["spent", "hour*", "time", "allocation*", "working on", "% on"],
+    "problem_report": ["problem*", "issue*", "frustrat*", "difficult*", "broken", "bug*"],
+    "success_story": ["success*", "achievement*", "completed", "good", "well", "productive"],
+}
+
+_END = ""
+_PREFIX = "*"
+_MAX_RESOLVED = 10000
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Render a character trie as a prefix-factored regex."""
+    branches: List[str] = []
+    for char, child in node.items():
+        if char in (_END, _PREFIX):
+            continue
+        head = r"\s+" if char == " " else re.escape(char)
+        branches.append(head + _trie_pattern(child))
+    # Longer keywords are tried before a keyword ending here
+    if _PREFIX in node:
+        branches.append(r"\w*")
+    elif _END in node:
+        branches.append(r"(?!\w)" if node[_END] else "")
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+class MessageClassifier:
+    """Score every category in one scan of the message.
+
+    All keywords are compiled into one prefix-factored alternation, so the
+    message is scanned once regardless of how many keywords there are. Each
+    match adds one point to its category; the highest score wins, ties go
+    to the category listed first, and messages with no match fall back to
+    ``default``.
+    """
+
+    def __init__(
+        self,
+        keywords: Mapping[str, Sequence[str]] = DEFAULT_CLASSIFIER_KEYWORDS,
+        default: str = "general",
+    ) -> None:
+        self.default = default
+        self.categories: List[str] = []
+        self._exact: Dict[str, str] = {}
+        # Matched text -> category, including resolved prefix matches
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._prefixes: Dict[str, str] = {}
+        word_trie: Dict = {}
+        symbol_trie: Dict = {}
+        for category, words in keywords.items():
+            for word in words:
+                word = " ".join(word.lower().split())
+                prefix = word.endswith("*")
+                word = word.rstrip("*").strip()
+                if not word:
+                    continue
+                if category not in self.categories:
+                    self.categories.append(category)
+                # The first category listing a keyword owns it
+                (self._prefixes if prefix else self._exact).setdefault(word, category)
+                node = word_trie if word[0].isalnum() else symbol_trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                if prefix:
+                    node[_PREFIX] = True
+                else:
+                    node[_END] = word[-1].isalnum()
+        alternatives = []
+        if word_trie:
+            alternatives.append(r"\b" + _trie_pattern(word_trie))
+        if symbol_trie:
+            alternatives.append(_trie_pattern(symbol_trie))
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+        self._longest_prefix = max((len(p) for p in self._prefixes), default=0)
+
+    def _category_of(self, matched: str) -> Optional[str]:
+        try:
+            return self._resolved[matched]
+        except KeyError:
+            pass
+        normalized = " ".join(matched.split())
+        category = self._exact.get(normalized)
+        if category is None:
+            for end in range(min(len(normalized), self._longest_prefix), 0, -1):
+                category = self._prefixes.get(normalized[:end])
+                if category is not None:
+                    break
+        if len(self._resolved) < _MAX_RESOLVED:
+            self._resolved[matched] = category
+        return category
+
+    def scores(self, text: str) -> Counter:
+        """Return the number of keyword hits per category."""
+        counts: Counter = Counter()
+        if self._pattern is None or not text:
+            return counts
+        for matched in self._pattern.findall(text.lower()):
+            category = self._category_of(matched)
+            if category is not None:
+                counts[category] += 1
+        return counts
+
+    def classify(self, text: str) -> str:
+        counts = self.scores(text)
+        if not counts:
+            return self.default
+        return max(self.categories, key=lambda category: counts[category])
@@ -0,0 +1,97 @@
+"""Pooled HTTP client for calling platform APIs from async adapters."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _retry_after_seconds(resp: requests.Response, default: float) -> float:
+    """Return the delay requested by a ``Retry-After`` header."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class AsyncHTTPClient:
+    """Keep-alive HTTP client that does not block the event loop.
+
+    Requests go through one ``requests.Session`` whose connection pool holds
+    up to ``max_connections`` sockets, and run on a thread pool of the same
+    size, so at most ``max_connections`` requests are in flight and the rest
+    queue without holding the loop. HTTP 429 responses are retried up to
+    ``max_retries`` times after the ``Retry-After`` delay (capped at
+    ``max_retry_after`` seconds), sleeping on the loop rather than a thread.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        max_retry_after: float = 30.0,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="http-client")
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """POST ``payload`` as JSON, retrying while the server answers 429."""
+        loop = asyncio.get_running_loop()
+        send = partial(self.session.post, url, json=payload, headers=headers, timeout=self.timeout)
+        attempt = 0
+        while True:
+            self._count("requests")
+            try:
+                resp = await loop.run_in_executor(self._executor, send)
+            except requests.RequestException:
+                self._count("errors")
+                raise
+            if resp.status_code != 429 or attempt >= self.max_retries:
+                return resp
+            self._count("rate_limited")
+            attempt += 1
+            delay = min(_retry_after_seconds(resp, default=float(attempt)), self.max_retry_after)
+            resp.close()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
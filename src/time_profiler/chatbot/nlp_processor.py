@@ -3,49 +3,253 @@
 from __future__ import annotations
 
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
 
-from ..app import load_config
+from .. import config_registry
+
+
+# Basic synonym map for common user terms; extended by the config file's
+# optional "activitySynonyms" object and the ``synonyms`` argument.
+DEFAULT_SYNONYMS: Dict[str, str] = {
+    "meetings": "Meeting",
+    "meeting": "Meeting",
+    "research": "Research",
+    "analysis": "Analysis",
+    "admin": "Administration",
+    "administration": "Administration",
+    "development": "Development",
+    "project management": "Project Management",
+    "project": "Project Management",
+    "other": "Other",
+}
+
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|[a-z]+|[%,;]")
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Tokens allowed between a number and its activity ("20% of my time on ...")
+_FILLER = frozenset({"%", "percent", "pct", "of", "on", "in", "for", "doing", "hours", "hour", "hrs", "h", "my", "time"})
+# Joiners skipped inside multi-word names ("budget and financial management")
+_JOINERS = frozenset({"and"})
+_BREAKS = frozenset({",", ";"})
+# Unknown words tolerated between a number and its activity
+_MAX_GAP = 2
+# Tokens shorter than this must match exactly
+_MIN_FUZZY_LENGTH = 4
+_MAX_CACHED_VOCABULARIES = 8
+
+
+def _deletes(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if ``a`` and ``b`` differ by one insert, delete, substitution or swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (
+            len(diffs) == 2
+            and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]]
+            and a[diffs[1]] == b[diffs[0]]
+        )
+    if la > lb:
+        a, b = b, a
+    # b is one character longer than a
+    return any(b[:i] + b[i + 1:] == a for i in range(len(b)))
+
+
+class ActivityVocabulary:
+    """Token trie over activity names, sub-activities and synonyms.
+
+    Every phrase maps to a top-level category. Message tokens are matched
+    exactly or, for words of at least four letters, within one edit of a
+    vocabulary word (using a deletion index, so each lookup costs a few
+    dict probes). Built once per config version by :func:`get_vocabulary`.
+    """
+
+    def __init__(self, activities: Mapping[str, FrozenSet[str]], synonyms: Mapping[str, str]) -> None:
+        self._root: Dict = {}
+        self.categories = {category.lower(): category for category in activities}
+        # Category names first so they win over synonyms and sub-activities
+        phrases: List[Tuple[str, str]] = [(category, category) for category in activities]
+        phrases += [(name, category) for name, category in synonyms.items() if category in activities]
+        phrases += [
+            (sub, category)
+            for category, subs in activities.items()
+            for sub in sorted(subs)
+        ]
+        self._words: Set[str] = set()
+        for phrase, category in phrases:
+            tokens = [t for t in _WORD_RE.findall(phrase.lower()) if t not in _JOINERS]
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+                self._words.add(token)
+            node.setdefault(None, category)
+
+        self._delete_index: Dict[str, Set[str]] = {}
+        for word in self._words:
+            if len(word) >= _MIN_FUZZY_LENGTH - 1:
+                for variant in _deletes(word) | {word}:
+                    self._delete_index.setdefault(variant, set()).add(word)
+        self._corrections: Dict[str, Tuple[str, ...]] = {}
+
+    def _candidates(self, token: str) -> Tuple[str, ...]:
+        """Vocabulary words within one edit of ``token`` (just ``token`` if known)."""
+        cached = self._corrections.get(token)
+        if cached is not None:
+            return cached
+        if token in self._words:
+            found: Tuple[str, ...] = (token,)
+        elif len(token) < _MIN_FUZZY_LENGTH:
+            found = ()
+        else:
+            pool: Set[str] = set()
+            for variant in _deletes(token) | {token}:
+                pool |= self._delete_index.get(variant, set())
+            found = tuple(sorted(w for w in pool if _within_one_edit(token, w)))
+        if len(self._corrections) < 10000:
+            self._corrections[token] = found
+        return found
+
+    def match(self, tokens: List[str], start: int) -> Tuple[Optional[str], int]:
+        """Longest phrase starting at ``tokens[start]``.
+
+        Returns ``(category, end)`` where ``end`` is the index after the
+        phrase, or ``(None, start)`` if no phrase starts there.
+        """
+        node = self._root
+        best: Tuple[Optional[str], int] = (None, start)
+        i = start
+        while i < len(tokens):
+            token = tokens[i]
+            if token in _JOINERS and node is not self._root:
+                i += 1
+                continue
+            child = node.get(token)
+            if child is None:
+                for candidate in self._candidates(token):
+                    child = node.get(candidate)
+                    if child is not None:
+                        break
+            if child is None:
+                break
+            node = child
+            i += 1
+            if None in node:
+                best = (node[None], i)
+        return best
+
+
+_vocabularies: "OrderedDict[Tuple[str, FrozenSet[Tuple[str, str]]], ActivityVocabulary]" = OrderedDict()
+_vocabularies_lock = threading.Lock()
+
+
+def get_vocabulary(snapshot: config_registry.ConfigSnapshot, synonyms: Mapping[str, str]) -> ActivityVocabulary:
+    """Return the shared vocabulary for this config version and synonym set."""
+    key = (snapshot.version, frozenset(synonyms.items()))
+    with _vocabularies_lock:
+        vocabulary = _vocabularies.get(key)
+        if vocabulary is not None:
+            _vocabularies.move_to_end(key)
+            return vocabulary
+    vocabulary = ActivityVocabulary(snapshot.activities, synonyms)
+    with _vocabularies_lock:
+        vocabulary = _vocabularies.setdefault(key, vocabulary)
+        while len(_vocabularies) > _MAX_CACHED_VOCABULARIES:
+            _vocabularies.popitem(last=False)
+    return vocabulary
 
 
 class NLPProcessor:
     """Lightweight NLP processor for chatbot text."""
 
-    def __init__(self, config_path: Path | str | None = None):
+    def __init__(self, config_path: Path | str | None = None, synonyms: Mapping[str, str] | None = None):
         if config_path is None:
             config_path = Path(__file__).resolve().parents[3] / "config" / "dcri_config.json.example"
         self.config_path = Path(config_path)
-        self.config = load_config(self.config_path)
-        self.category_map = {
-            a["category"].lower(): a["category"] for a in self.config.get("activities", [])
-        }
-        # Basic synonym map for common user terms
-        self.synonyms = {
-            "meetings": "Meeting",
-            "meeting": "Meeting",
-            "research": "Research",
-            "analysis": "Analysis",
-            "admin": "Administration",
-            "administration": "Administration",
-            "development": "Development",
-            "project management": "Project Management",
-            "project": "Project Management",
-            "other": "Other",
-        }
+        self._registry = config_registry.get_config_registry(self.config_path)
+        self.extra_synonyms = dict(synonyms or {})
+        self._vocabulary: Optional[ActivityVocabulary] = None
+        self._vocabulary_version: Optional[str] = None
+
+    @property
+    def config(self) -> Mapping:
+        return self._registry.get().raw
+
+    @property
+    def category_map(self) -> Dict[str, str]:
+        return self.vocabulary.categories
+
+    @property
+    def synonyms(self) -> Dict[str, str]:
+        synonyms = dict(DEFAULT_SYNONYMS)
+        synonyms.update({k.lower(): v for k, v in self.config.get("activitySynonyms", {}).items()})
+        synonyms.update({k.lower(): v for k, v in self.extra_synonyms.items()})
+        return synonyms
+
+    @property
+    def vocabulary(self) -> ActivityVocabulary:
+        """Vocabulary for the current config version, rebuilt only when it changes."""
+        snapshot = self._registry.get()
+        if snapshot.version != self._vocabulary_version:
+            self._vocabulary = get_vocabulary(snapshot, self.synonyms)
+            self._vocabulary_version = snapshot.version
+        return self._vocabulary
 
     def map_activity(self, name: str) -> str | None:
-        name_lower = name.strip().lower()
-        if name_lower in self.category_map:
-            return self.category_map[name_lower]
-        return self.synonyms.get(name_lower)
+        tokens = _WORD_RE.findall(name.lower())
+        if not tokens:
+            return None
+        category, end = self.vocabulary.match(tokens, 0)
+        return category if end == len(tokens) else None
 
     def parse_time_allocation(self, text: str) -> Dict[str, float]:
-        """Parse phrases like '60% meetings, 30% research' into a dict."""
+        """Parse phrases like '60% meetings, 30% research' into a dict.
+
+        Scans the message once: each number is paired with the longest
+        activity name that follows it, skipping filler words such as
+        "% of" and up to two unknown words.
+        """
+        vocabulary = self.vocabulary
+        tokens = _TOKEN_RE.findall(text.lower())
         allocations: Dict[str, float] = {}
-        pattern = re.compile(r"(\d+(?:\.\d+)?)\s*%?\s*(?:of\s+)?([a-zA-Z ]+?)(?=,|and|$)", re.IGNORECASE)
-        for value, activity_name in pattern.findall(text):
-            category = self.map_activity(activity_name.strip())
+        value: Optional[float] = None
+        gap = 0
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token[0].isdigit():
+                value, gap = float(token), 0
+                i += 1
+                continue
+            if value is None or token in _FILLER:
+                i += 1
+                continue
+            if token in _BREAKS:
+                value = None
+                i += 1
+                continue
+            category, end = vocabulary.match(tokens, i)
             if category:
-                allocations[category] = float(value)
+                allocations[category] = value
+                value = None
+                i = end
+                continue
+            gap += 1
+            if gap > _MAX_GAP:
+                value = None
+            i += 1
         return allocations
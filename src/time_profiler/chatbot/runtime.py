@@ -0,0 +1,139 @@
+"""Event loop, thread pool and timing helpers for the chatbot pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Awaitable, Dict, Hashable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class EventLoopThread:
+    """Run an asyncio event loop in a daemon thread for the app's lifetime.
+
+    Flask request threads hand coroutines to :meth:`run` (or :meth:`submit`)
+    instead of calling ``asyncio.run`` per request, so messages from every
+    webhook share one loop and any loop-bound resources such as HTTP
+    connection pools.
+    """
+
+    def __init__(self, name: str = "chatbot-loop") -> None:
+        self.loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Schedule ``coro`` on the loop and return a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the loop and block the calling thread for its result.
+
+        Raises ``concurrent.futures.TimeoutError`` (after cancelling the
+        coroutine) if it does not finish within ``timeout`` seconds.
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the loop, cancelling anything still running on it."""
+        if not self.running:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+
+class StageTimer:
+    """Thread-safe wall-clock timings per named pipeline stage."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return count and average/max milliseconds per stage."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": entry["count"],
+                    "avg_ms": entry["total_ms"] / entry["count"],
+                    "max_ms": entry["max_ms"],
+                }
+                for stage, entry in self._stages.items()
+            }
+
+
+class KeyedLock:
+    """One ``asyncio.Lock`` per key, created on demand and dropped when idle.
+
+    Holders of the same key run one at a time in the order they asked for
+    the lock (``asyncio.Lock`` wakes waiters first-in, first-out); holders of
+    different keys never wait on each other. Use from a single event loop;
+    the ordering does not extend to other processes.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._holders: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._holders[key] -= 1
+            if not self._holders[key]:
+                del self._holders[key]
+                del self._locks[key]
+
+    def __len__(self) -> int:
+        """Number of keys currently held or waited on."""
+        return len(self._locks)
@@ -0,0 +1,344 @@
+"""Conversation state kept by the chatbot service between messages.
+
+State is loaded and saved through a :class:`ConversationStateBackend`. The
+default :class:`MemoryStateBackend` keeps states in this process; the
+:class:`DatabaseStateBackend` stores them in ``chatbot_conversation_states``
+so several chatbot workers can serve the same user. Both use optimistic
+versioning: saving a state whose ``version`` is no longer current raises
+:class:`StaleConversationState` instead of overwriting the newer copy.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+
+
+class StaleConversationState(Exception):
+    """Raised when a state was changed by someone else since it was loaded."""
+
+
+class ConversationState:
+    """Manages conversation state for individual users."""
+
+    __slots__ = ("user_id", "current_flow", "context", "last_activity", "version")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.current_flow: Optional[str] = None
+        self.context: Dict[str, Any] = {}
+        self.last_activity: datetime = datetime.utcnow()
+        # Version of the stored copy this state was loaded from; 0 if unsaved
+        self.version = 0
+
+    def update_context(self, key: str, value: Any):
+        """Update conversation context."""
+        self.context[key] = value
+        self.last_activity = datetime.utcnow()
+
+    def get_context(self, key: str, default=None):
+        """Get value from conversation context."""
+        return self.context.get(key, default)
+
+    def reset(self):
+        """Reset conversation state."""
+        self.current_flow = None
+        self.context = {}
+        self.last_activity = datetime.utcnow()
+
+
+class ConversationStateStore:
+    """Bounded map of user id to :class:`ConversationState`.
+
+    Entries are kept in least-recently-used order; every lookup refreshes
+    ``last_activity``. States idle for longer than ``idle_ttl`` seconds are
+    dropped as the store is used, and once ``max_states`` users are live the
+    least recently used state is evicted to make room.
+    """
+
+    def __init__(self, max_states: int = 10000, idle_ttl: float = 3600.0) -> None:
+        self.max_states = max_states
+        self.idle_ttl = timedelta(seconds=idle_ttl)
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "hits": 0, "evicted_idle": 0, "evicted_lru": 0}
+
+    def get_or_create(self, user_id: str) -> ConversationState:
+        """Return the user's state, creating a fresh one if none is live."""
+        now = datetime.utcnow()
+        with self._lock:
+            self._evict_idle(now)
+            state = self._states.get(user_id)
+            if state is not None:
+                self._states.move_to_end(user_id)
+                self._stats["hits"] += 1
+            else:
+                while len(self._states) >= self.max_states:
+                    self._states.popitem(last=False)
+                    self._stats["evicted_lru"] += 1
+                state = ConversationState(user_id)
+                self._states[user_id] = state
+                self._stats["created"] += 1
+            state.last_activity = now
+            return state
+
+    def get(self, user_id: str) -> Optional[ConversationState]:
+        """Return the user's live state without creating one."""
+        with self._lock:
+            self._evict_idle(datetime.utcnow())
+            return self._states.get(user_id)
+
+    def discard(self, user_id: str) -> None:
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    def sweep(self) -> int:
+        """Drop every idle state now; returns how many were evicted."""
+        with self._lock:
+            return self._evict_idle(datetime.utcnow())
+
+    def _evict_idle(self, now: datetime) -> int:
+        # LRU order matches last_activity order, so idle states sit at the front
+        cutoff = now - self.idle_ttl
+        evicted = 0
+        while self._states:
+            state = next(iter(self._states.values()))
+            if state.last_activity >= cutoff:
+                break
+            self._states.popitem(last=False)
+            evicted += 1
+        self._stats["evicted_idle"] += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        """Return live state count plus creation, hit and eviction counters."""
+        with self._lock:
+            return {"live": len(self._states), "max_states": self.max_states, **self._stats}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._states
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._states))
+
+
+class ConversationStateBackend(ABC):
+    """Where conversation states live between messages."""
+
+    # Whether load/save do I/O and should run off the event loop
+    blocking = True
+
+    @abstractmethod
+    def load(self, user_id: str) -> Optional[ConversationState]:
+        """Return a copy of the user's live state, or None."""
+
+    @abstractmethod
+    def save(self, state: ConversationState) -> None:
+        """Store ``state`` and bump its version.
+
+        Raises :class:`StaleConversationState` if the stored version is no
+        longer ``state.version``.
+        """
+
+    @abstractmethod
+    def delete(self, user_id: str) -> None:
+        """Forget the user's state."""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+    def get_or_create(self, user_id: str) -> ConversationState:
+        return self.load(user_id) or ConversationState(user_id)
+
+    def update(
+        self, user_id: str, change: Callable[[ConversationState], None], retries: int = 3
+    ) -> ConversationState:
+        """Apply ``change`` to the user's state, retrying on version conflicts."""
+        attempt = 0
+        while True:
+            state = self.get_or_create(user_id)
+            change(state)
+            try:
+                self.save(state)
+                return state
+            except StaleConversationState:
+                attempt += 1
+                if attempt > retries:
+                    raise
+
+
+class MemoryStateBackend(ConversationStateBackend):
+    """Per-process backend on top of a bounded :class:`ConversationStateStore`."""
+
+    blocking = False
+
+    def __init__(self, max_states: int = 10000, idle_ttl: float = 3600.0) -> None:
+        self.store = ConversationStateStore(max_states=max_states, idle_ttl=idle_ttl)
+        self._lock = threading.Lock()
+
+    def load(self, user_id: str) -> Optional[ConversationState]:
+        stored = self.store.get(user_id)
+        return _copy_state(stored) if stored is not None else None
+
+    def save(self, state: ConversationState) -> None:
+        with self._lock:
+            stored = self.store.get(state.user_id)
+            current = stored.version if stored is not None else 0
+            if current != state.version:
+                raise StaleConversationState(state.user_id)
+            stored = self.store.get_or_create(state.user_id)
+            stored.current_flow = state.current_flow
+            stored.context = copy.deepcopy(state.context)
+            stored.version = state.version = current + 1
+            state.last_activity = stored.last_activity
+
+    def delete(self, user_id: str) -> None:
+        self.store.discard(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+
+class DatabaseStateBackend(ConversationStateBackend):
+    """Backend storing states in the ``chatbot_conversation_states`` table.
+
+    Each save is a compare-and-swap on ``version``: an ``UPDATE ... WHERE
+    version = :loaded`` for existing rows, or an ``INSERT`` that fails on the
+    primary key if another worker created the row first. Rows idle for
+    longer than ``idle_ttl`` seconds are treated as absent and removed by
+    :meth:`purge_idle`.
+    """
+
+    def __init__(self, session_factory=None, idle_ttl: float = 3600.0) -> None:
+        if session_factory is None:
+            from ..app import SessionLocal
+
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.idle_ttl = timedelta(seconds=idle_ttl)
+        self._stats_lock = threading.Lock()
+        self._stats = {"loads": 0, "saves": 0, "conflicts": 0}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def load(self, user_id: str) -> Optional[ConversationState]:
+        row_model = models.ChatbotConversationState
+        self._count("loads")
+        session = self.session_factory()
+        try:
+            row = session.execute(
+                select(row_model.current_flow, row_model.context, row_model.last_activity, row_model.version)
+                .where(row_model.user_id == user_id)
+            ).first()
+        finally:
+            session.close()
+        if row is None or row.last_activity < datetime.utcnow() - self.idle_ttl:
+            return None
+        state = ConversationState(user_id)
+        state.current_flow = row.current_flow
+        state.context = dict(row.context or {})
+        state.last_activity = row.last_activity
+        state.version = row.version
+        return state
+
+    def save(self, state: ConversationState) -> None:
+        row_model = models.ChatbotConversationState
+        now = datetime.utcnow()
+        values = {"current_flow": state.current_flow, "context": state.context, "last_activity": now}
+        session = self.session_factory()
+        try:
+            if state.version:
+                result = session.execute(
+                    update(row_model)
+                    .where(row_model.user_id == state.user_id, row_model.version == state.version)
+                    .values(version=state.version + 1, **values)
+                )
+                swapped = result.rowcount == 1
+            else:
+                # Replace an expired row; a live row means someone else won
+                session.execute(
+                    delete(row_model).where(
+                        row_model.user_id == state.user_id,
+                        row_model.last_activity < now - self.idle_ttl,
+                    )
+                )
+                session.add(row_model(user_id=state.user_id, version=1, **values))
+                try:
+                    session.flush()
+                    swapped = True
+                except IntegrityError:
+                    swapped = False
+            if not swapped:
+                session.rollback()
+                self._count("conflicts")
+                raise StaleConversationState(state.user_id)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self._count("saves")
+        state.version += 1
+        state.last_activity = now
+
+    def delete(self, user_id: str) -> None:
+        session = self.session_factory()
+        try:
+            session.execute(
+                delete(models.ChatbotConversationState)
+                .where(models.ChatbotConversationState.user_id == user_id)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def purge_idle(self) -> int:
+        """Delete rows idle longer than the TTL; returns how many were removed."""
+        row_model = models.ChatbotConversationState
+        session = self.session_factory()
+        try:
+            result = session.execute(
+                delete(row_model).where(row_model.last_activity < datetime.utcnow() - self.idle_ttl)
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+def _copy_state(stored: ConversationState) -> ConversationState:
+    state = ConversationState(stored.user_id)
+    state.current_flow = stored.current_flow
+    state.context = copy.deepcopy(stored.context)
+    state.last_activity = stored.last_activity
+    state.version = stored.version
+    return state
+
+
+def create_state_backend(name: str, max_states: int = 10000, idle_ttl: float = 3600.0) -> ConversationStateBackend:
+    """Return the backend configured by ``CHATBOT_STATE_BACKEND``."""
+    if name == "memory":
+        return MemoryStateBackend(max_states=max_states, idle_ttl=idle_ttl)
+    if name == "database":
+        return DatabaseStateBackend(idle_ttl=idle_ttl)
+    raise ValueError(f"Unknown chatbot state backend: {name}")
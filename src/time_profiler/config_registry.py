@@ -0,0 +1,99 @@
+"""Process-wide cache of the parsed DCRI configuration file."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable view of one version of the configuration file.
+
+    ``version`` is the SHA-256 of the file contents, so consumers can
+    cheaply detect when derived structures need rebuilding.
+    """
+
+    raw: Mapping[str, Any]
+    version: str
+    groups: FrozenSet[str]
+    activities: Mapping[str, FrozenSet[str]]
+    parents: Mapping[str, Optional[str]]
+    enable_free_text_feedback: bool
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "ConfigSnapshot":
+        data = json.loads(payload.decode("utf-8"))
+        groups = data.get("groups", [])
+        activities = {
+            a["category"]: frozenset(a.get("sub_activities", []))
+            for a in data.get("activities", [])
+        }
+        return cls(
+            raw=MappingProxyType(data),
+            version=hashlib.sha256(payload).hexdigest(),
+            groups=frozenset(g["id"] for g in groups),
+            activities=MappingProxyType(activities),
+            parents=MappingProxyType({g["id"]: g.get("parent") for g in groups}),
+            enable_free_text_feedback=bool(data.get("enableFreeTextFeedback")),
+        )
+
+
+class ConfigRegistry:
+    """Parse a config file once and reload it only when it changes on disk.
+
+    Each :meth:`get` call costs a single ``stat``. When the modification
+    time or size differs from the cached value the file is re-read, and the
+    snapshot is only rebuilt if the content hash actually changed.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[ConfigSnapshot] = None
+
+    def _current_stat_key(self) -> Tuple[int, int]:
+        st = self.path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def get(self) -> ConfigSnapshot:
+        """Return the current snapshot, reloading if the file changed."""
+        stat_key = self._current_stat_key()
+        snapshot = self._snapshot
+        if snapshot is not None and stat_key == self._stat_key:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and stat_key == self._stat_key:
+                return self._snapshot
+            payload = self.path.read_bytes()
+            digest = hashlib.sha256(payload).hexdigest()
+            if self._snapshot is None or self._snapshot.version != digest:
+                self._snapshot = ConfigSnapshot.from_bytes(payload)
+            self._stat_key = stat_key
+            return self._snapshot
+
+
+_registries: Dict[Path, ConfigRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_config_registry(path: Path | str) -> ConfigRegistry:
+    """Return the shared registry for ``path``, creating it on first use."""
+    key = Path(path).resolve()
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, ConfigRegistry(key))
+    return registry
+
+
+def get_config(path: Path | str) -> ConfigSnapshot:
+    """Shortcut for ``get_config_registry(path).get()``."""
+    return get_config_registry(path).get()
@@ -2,38 +2,243 @@
 
 from __future__ import annotations
 
+import csv
+import io
+import json
+import logging
 from collections import defaultdict
-from typing import Dict
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import func, select, update
 
 from .app import SessionLocal
 from . import models
+from .reporting import _apply_filters, record_new_allocations
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_CHECKPOINT = "activity_logs_to_time_allocations"
+
+
+def _load_checkpoint(session, name: str) -> models.MigrationCheckpoint:
+    checkpoint = (
+        session.query(models.MigrationCheckpoint)
+        .filter_by(name=name)
+        .with_for_update()
+        .first()
+    )
+    if checkpoint is None:
+        checkpoint = models.MigrationCheckpoint(name=name, last_id=0)
+        session.add(checkpoint)
+    return checkpoint
+
+
+def _start_checkpoint(session, max_id: int, legacy_watermark: Optional[int]) -> None:
+    """Create the checkpoint on the first run, at ``legacy_watermark`` if given."""
+    exists = session.get(models.MigrationCheckpoint, ACTIVITY_LOG_CHECKPOINT) is not None
+    if exists:
+        if legacy_watermark is not None:
+            logger.info("Checkpoint %s exists; ignoring legacy watermark %d", ACTIVITY_LOG_CHECKPOINT, legacy_watermark)
+        return
+    if legacy_watermark is not None:
+        logger.warning(
+            "Skipping ActivityLog ids <= %d as converted by the pre-checkpoint migration", legacy_watermark
+        )
+        session.add(models.MigrationCheckpoint(name=ACTIVITY_LOG_CHECKPOINT, last_id=legacy_watermark))
+        session.commit()
+    elif max_id and session.execute(select(models.TimeAllocation.id).limit(1)).first() is not None:
+        logger.warning(
+            "Converting all %d ActivityLog ids from the start. If the pre-checkpoint migration already "
+            "ran, stop and pass its last converted id as legacy_watermark to avoid duplicates",
+            max_id,
+        )
+
 
+def migrate_activity_logs_to_time_allocations(chunk_size: int = 10000, legacy_watermark: Optional[int] = None) -> int:
+    """Convert ActivityLog records into summarized TimeAllocation entries.
 
-def migrate_activity_logs_to_time_allocations() -> None:
-    """Convert ActivityLog records into summarized TimeAllocation entries."""
+    Logs are processed in id ranges of ``chunk_size``. Each range is grouped
+    in SQL into one allocation per group, and committed together with the
+    advanced watermark in ``migration_checkpoints``. An interrupted run resumes
+    after the last committed range, and re-running only picks up logs added
+    since. A group spanning several ranges gets one allocation per range.
+
+    The pre-checkpoint version of this migration converted every log in one
+    pass without recording how far it got. If it has run on this database,
+    pass the highest ActivityLog id it converted as ``legacy_watermark`` on
+    the first run; those logs are then skipped instead of converted again.
+    It is ignored once a checkpoint exists.
+
+    Returns the number of TimeAllocation rows created.
+    """
+    log = models.ActivityLog
+    created = 0
     session = SessionLocal()
     try:
-        grouped: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
-        for log in session.query(models.ActivityLog).all():
-            grouped[log.group_id][log.activity] += 1.0
+        max_id = session.execute(select(func.max(log.id))).scalar() or 0
+        _start_checkpoint(session, max_id, legacy_watermark)
+        while True:
+            checkpoint = _load_checkpoint(session, ACTIVITY_LOG_CHECKPOINT)
+            last_id = checkpoint.last_id or 0
+            if last_id >= max_id:
+                session.commit()
+                break
+            upper = min(last_id + chunk_size, max_id)
 
-        for group_id, activities in grouped.items():
-            allocation = models.TimeAllocation(group_id=group_id, activities=dict(activities))
-            session.add(allocation)
+            grouped: Dict[str, Dict[str, float]] = defaultdict(dict)
+            rows = session.execute(
+                select(log.group_id, log.activity, func.count(log.id))
+                .where(log.id > last_id, log.id <= upper)
+                .group_by(log.group_id, log.activity)
+            )
+            for group_id, activity, count in rows:
+                grouped[group_id][activity] = float(count)
 
-        session.commit()
+            allocations = [
+                models.TimeAllocation(group_id=group_id, activities=activities)
+                for group_id, activities in grouped.items()
+            ]
+            session.add_all(allocations)
+            record_new_allocations(session, allocations)
+
+            checkpoint.last_id = upper
+            checkpoint.updated_at = datetime.utcnow()
+            session.commit()
+            created += len(allocations)
+        return created
+    except Exception:
+        session.rollback()
+        raise
     finally:
         session.close()
 
 
+def backfill_feedback_sentiment(batch_size: int = 1000, workers: int = 1) -> int:
+    """Compute and store sentiment for ChatbotFeedback rows missing it.
+
+    Rows are read by ascending id in batches and each batch is written back
+    with one bulk UPDATE and commit. With ``workers > 1`` scoring is spread
+    over a process pool that lives for the whole run. Returns the number of
+    rows scored.
+    """
+    from .ai_insights.sentiment import analyze_sentiment_batch, sentiment_pool
+
+    feedback = models.ChatbotFeedback
+    scored = 0
+    last_id = 0
+    executor = sentiment_pool(workers) if workers > 1 else None
+    chunk_size = max(1, batch_size // (workers * 2))
+    session = SessionLocal()
+    try:
+        while True:
+            rows = session.execute(
+                select(feedback.id, feedback.message_text)
+                .where(feedback.sentiment.is_(None), feedback.id > last_id)
+                .order_by(feedback.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            scores = analyze_sentiment_batch([text for _, text in rows], executor, chunk_size)
+            session.execute(
+                update(feedback),
+                [{"id": row_id, "sentiment": score} for (row_id, _), score in zip(rows, scores)],
+            )
+            session.commit()
+            scored += len(rows)
+            last_id = rows[-1][0]
+        return scored
+    finally:
+        session.close()
+        if executor is not None:
+            executor.shutdown()
+
+
 def export_time_allocations() -> Dict[str, Dict[str, float]]:
-    """Export all time allocations as a nested dictionary."""
+    """Export all time allocations as a nested dictionary.
+
+    Reads ``TimeAllocation.activities`` rather than the derived
+    ``allocation_activity_hours`` rows, so allocations inserted without
+    :func:`~time_profiler.reporting.record_new_allocations` are exported too.
+    """
     session = SessionLocal()
     try:
+        model = models.TimeAllocation
+        rows = session.execute(
+            select(model.group_id, model.activities)
+            .order_by(model.id)
+            .execution_options(yield_per=1000)
+        )
         data = {}
-        for entry in session.query(models.TimeAllocation).all():
-            data.setdefault(entry.group_id, []).append(entry.activities)
+        for group_id, activities in rows:
+            data.setdefault(group_id, []).append(activities)
         return data
     finally:
         session.close()
 
+
+def iter_time_allocations(
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> Iterator[Dict[str, Any]]:
+    """Yield time allocations one at a time without loading the full table.
+
+    Rows are fetched ``batch_size`` at a time through a server-side cursor
+    where the driver supports one, so memory use stays constant.
+    """
+    model = models.TimeAllocation
+    query = select(model.id, model.group_id, model.timestamp, model.activities, model.feedback)
+    query = _apply_filters(query, model, group_id, start, end).order_by(model.id)
+    session = SessionLocal()
+    try:
+        rows = session.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+        for allocation_id, gid, timestamp, activities, feedback in rows:
+            yield {
+                "id": allocation_id,
+                "group_id": gid,
+                "timestamp": timestamp.isoformat(),
+                "activities": activities,
+                "feedback": feedback,
+            }
+    finally:
+        session.close()
+
+
+def stream_time_allocations_ndjson(
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> Iterator[str]:
+    """Yield one JSON document per line for each time allocation."""
+    for record in iter_time_allocations(group_id, start, end, batch_size):
+        yield json.dumps(record) + "\n"
+
+
+def stream_time_allocations_csv(
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> Iterator[str]:
+    """Yield CSV text with one row per allocation and activity.
+
+    Activities come from ``TimeAllocation.activities``, like the NDJSON
+    export; output is emitted in chunks of roughly ``batch_size`` rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["allocation_id", "group_id", "timestamp", "activity", "hours"])
+    written = 0
+    for record in iter_time_allocations(group_id, start, end, batch_size):
+        for activity, hrs in (record["activities"] or {}).items():
+            writer.writerow([record["id"], record["group_id"], record["timestamp"], activity, float(hrs)])
+            written += 1
+            if written % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
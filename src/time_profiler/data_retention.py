@@ -4,75 +4,154 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, select, tuple_, update
 
 from .app import SessionLocal
 from . import models
 
 
+class _SummaryBuilder:
+    """Fold submission payloads of one type into summary data."""
+
+    def __init__(self, submission_type: str):
+        self.submission_type = submission_type
+        self.count = 0
+        self.totals: Dict[str, float] = defaultdict(float)
+
+    def add(self, submission_data: Dict) -> None:
+        self.count += 1
+        if self.submission_type == "time_allocation":
+            for act, hrs in submission_data.get("activities", {}).items():
+                self.totals[act] += hrs
+        elif self.submission_type == "activity_log":
+            act = submission_data.get("activity")
+            if act:
+                self.totals[act] += 1
+
+    def result(self) -> Dict:
+        if self.submission_type == "time_allocation":
+            if self.count:
+                return {act: hrs / self.count for act, hrs in self.totals.items()}
+        elif self.submission_type == "activity_log":
+            return {act: int(n) for act, n in self.totals.items()}
+        return {"count": self.count}
+
+
 def summarize_entries(entries: list[models.UserSubmissionHistory]) -> Dict:
     """Return a summarized representation of the given submission entries."""
     if not entries:
         return {}
 
-    subtype = entries[0].submission_type
-    if subtype == "time_allocation":
-        totals: Dict[str, float] = defaultdict(float)
-        count = 0
-        for e in entries:
-            activities = e.submission_data.get("activities", {})
-            for act, hrs in activities.items():
-                totals[act] += hrs
-            count += 1
-        if count:
-            return {act: hrs / count for act, hrs in totals.items()}
-    elif subtype == "activity_log":
-        counts: Dict[str, int] = defaultdict(int)
-        for e in entries:
-            act = e.submission_data.get("activity")
-            if act:
-                counts[act] += 1
-        return counts
-    return {"count": len(entries)}
+    builder = _SummaryBuilder(entries[0].submission_type)
+    for e in entries:
+        builder.add(e.submission_data)
+    return builder.result()
+
+
+def _ranked_history():
+    """Subquery numbering each user's submissions of a type, newest first."""
+    history = models.UserSubmissionHistory
+    rank = func.row_number().over(
+        partition_by=(history.user_id, history.submission_type),
+        order_by=(history.timestamp.desc(), history.id.desc()),
+    )
+    return select(
+        history.id,
+        history.user_id,
+        history.submission_type,
+        history.submission_data,
+        history.timestamp,
+        history.is_current,
+        rank.label("rank"),
+    ).subquery("ranked")
+
+
+def _archive_pairs(session, ranked, pairs: List[Tuple[str, str]], now: datetime) -> None:
+    """Summarize and archive superseded submissions for the given pairs."""
+    pair_filter = (
+        ranked.c.rank > 1,
+        ranked.c.is_current.is_(True),
+        tuple_(ranked.c.user_id, ranked.c.submission_type).in_(pairs),
+    )
+
+    periods = session.execute(
+        select(
+            ranked.c.user_id,
+            ranked.c.submission_type,
+            func.min(ranked.c.timestamp),
+            func.max(ranked.c.timestamp),
+        )
+        .where(*pair_filter)
+        .group_by(ranked.c.user_id, ranked.c.submission_type)
+    ).all()
+
+    builders: Dict[Tuple[str, str], _SummaryBuilder] = {
+        (user_id, sub_type): _SummaryBuilder(sub_type) for user_id, sub_type, _, _ in periods
+    }
+    payloads = session.execute(
+        select(ranked.c.user_id, ranked.c.submission_type, ranked.c.submission_data)
+        .where(*pair_filter)
+        .execution_options(yield_per=1000)
+    )
+    for user_id, sub_type, submission_data in payloads:
+        builders[(user_id, sub_type)].add(submission_data)
+
+    session.add_all([
+        models.SubmissionSummary(
+            user_id=user_id,
+            submission_type=sub_type,
+            summary_data=builders[(user_id, sub_type)].result(),
+            start_period=start_period,
+            end_period=end_period,
+        )
+        for user_id, sub_type, start_period, end_period in periods
+    ])
+
+    history = models.UserSubmissionHistory
+    superseded_ids = select(ranked.c.id).where(*pair_filter)
+    session.execute(
+        update(history)
+        .where(history.id.in_(superseded_ids))
+        .values(is_current=False, archived_at=now),
+        execution_options={"synchronize_session": False},
+    )
 
 
-def run_retention_tasks() -> None:
-    """Archive old submissions and store summarized history."""
+def _batched(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_retention_tasks(batch_size: int = 500) -> None:
+    """Archive old submissions and store summarized history.
+
+    For every (user_id, submission_type) pair, all submissions except the
+    newest that are still flagged ``is_current`` are summarized into one
+    ``SubmissionSummary`` row and archived. Superseded rows are found with a
+    ``ROW_NUMBER()`` window and updated in bulk. Pairs are processed
+    ``batch_size`` at a time, one transaction per batch. Rows archived by an
+    earlier run are not summarized again.
+    """
     session = SessionLocal()
     now = datetime.utcnow()
     try:
-        distinct_pairs = (
-            session.query(models.UserSubmissionHistory.user_id,
-                          models.UserSubmissionHistory.submission_type)
-            .distinct()
-            .all()
-        )
-        for user_id, sub_type in distinct_pairs:
-            records = (
-                session.query(models.UserSubmissionHistory)
-                .filter_by(user_id=user_id, submission_type=sub_type)
-                .order_by(models.UserSubmissionHistory.timestamp.desc())
-                .all()
-            )
-            if not records:
-                continue
-            latest = records[0]
-            old = records[1:]
-            if not old:
-                continue
-            summary_data = summarize_entries(old)
-            summary = models.SubmissionSummary(
-                user_id=user_id,
-                submission_type=sub_type,
-                summary_data=summary_data,
-                start_period=min(e.timestamp for e in old),
-                end_period=max(e.timestamp for e in old),
+        ranked = _ranked_history()
+        pairs = [
+            tuple(row)
+            for row in session.execute(
+                select(ranked.c.user_id, ranked.c.submission_type)
+                .where(ranked.c.rank > 1, ranked.c.is_current.is_(True))
+                .group_by(ranked.c.user_id, ranked.c.submission_type)
+                .order_by(ranked.c.user_id, ranked.c.submission_type)
             )
-            session.add(summary)
-            for rec in old:
-                rec.is_current = False
-                rec.archived_at = now
-        session.commit()
+        ]
+        for batch in _batched(pairs, batch_size):
+            _archive_pairs(session, ranked, batch, now)
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
     finally:
         session.close()
-
@@ -0,0 +1,212 @@
+"""Optional write-behind queue that group-commits submitted rows.
+
+When enabled (``INGEST_QUEUE_ENABLED``), the submission endpoints hand new
+ORM objects to an :class:`IngestionQueue` and respond immediately with
+``202 Accepted``. A background thread collects queued objects and writes them
+in one transaction once ``INGEST_BATCH_SIZE`` objects are waiting or the
+oldest has waited ``INGEST_MAX_DELAY`` seconds.
+
+Durability: an accepted row is only durable after its batch commits. Rows
+still in memory are lost if the process is killed (SIGKILL, OOM, crash).
+On a normal interpreter exit the queue is drained by an ``atexit`` hook, and
+:meth:`IngestionQueue.flush` can be called to force a write. If a batch fails
+to commit, its objects are retried one at a time so a single bad row does not
+drop the rest; rows that still fail are counted in ``failed`` and logged.
+When the queue is full, :meth:`IngestionQueue.submit` returns False and the
+caller should write synchronously instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .app import SessionLocal
+from . import models
+from .reporting import record_new_allocations
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+_STOP = object()
+
+
+def write_objects(session, objects: List[Any]) -> None:
+    """Add ``objects`` to ``session`` along with their derived rows."""
+    session.add_all(objects)
+    allocations = [o for o in objects if isinstance(o, models.TimeAllocation)]
+    if allocations:
+        record_new_allocations(session, allocations)
+
+
+class IngestionQueue:
+    """Background writer that commits queued ORM objects in batches."""
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        max_delay: float = 0.5,
+        max_queue_size: int = 10000,
+        writer: Callable[[Any, List[Any]], None] = write_objects,
+    ) -> None:
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.writer = writer
+        self._queue: "queue.Queue[Tuple[Any, float]]" = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "enqueued": 0,
+            "rejected": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    # Producer API -----------------------------------------------------
+
+    def submit(self, obj: Any) -> bool:
+        """Queue ``obj`` for writing. Returns False if the queue is full or closed."""
+        if self._closed:
+            return False
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+        try:
+            self._queue.put_nowait((obj, time.monotonic()))
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["enqueued"] -= 1
+                self._stats["rejected"] += 1
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until every object queued so far has been written."""
+        if self._closed:
+            return
+        self._queue.put((_FLUSH, time.monotonic()))
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write any queued objects and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, time.monotonic()))
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue depth, throughput and commit latency counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total_commit_ms = stats.pop("total_commit_ms")
+        stats["avg_commit_ms"] = total_commit_ms / stats["batches"] if stats["batches"] else 0.0
+        # Accepted objects not yet committed, including the batch being written
+        stats["depth"] = stats["enqueued"] - stats["written"] - stats["failed"]
+        return stats
+
+    # Writer thread ----------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            obj, enqueued_at = self._queue.get()
+            batch: List[Tuple[Any, float]] = []
+            markers = 1
+            stop = obj is _STOP
+            if obj is not _FLUSH and not stop:
+                batch.append((obj, enqueued_at))
+                deadline = enqueued_at + self.max_delay
+                while len(batch) < self.batch_size:
+                    # Take rows that are already waiting first: under a backlog
+                    # the oldest row is past its deadline, but the batch
+                    # should still fill up
+                    try:
+                        obj, enqueued_at = self._queue.get_nowait()
+                    except queue.Empty:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            obj, enqueued_at = self._queue.get(timeout=remaining)
+                        except queue.Empty:
+                            break
+                    markers += 1
+                    if obj is _FLUSH:
+                        break
+                    if obj is _STOP:
+                        stop = True
+                        break
+                    batch.append((obj, enqueued_at))
+
+            if stop:
+                # Drain anything queued before close() was called
+                while True:
+                    try:
+                        obj, enqueued_at = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    markers += 1
+                    if obj is not _FLUSH and obj is not _STOP:
+                        batch.append((obj, enqueued_at))
+
+            if batch:
+                self._write_batch(batch)
+            for _ in range(markers):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple[Any, float]]) -> None:
+        objects = [obj for obj, _ in batch]
+        started = time.monotonic()
+        written, failed = self._commit(objects)
+        finished = time.monotonic()
+
+        commit_ms = (finished - started) * 1000
+        wait_ms = (finished - min(ts for _, ts in batch)) * 1000
+        with self._stats_lock:
+            self._stats["written"] += written
+            self._stats["failed"] += failed
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_commit_ms"] = commit_ms
+            self._stats["max_commit_ms"] = max(self._stats["max_commit_ms"], commit_ms)
+            self._stats["total_commit_ms"] += commit_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+
+    def _commit(self, objects: List[Any]) -> Tuple[int, int]:
+        session = SessionLocal()
+        try:
+            self.writer(session, objects)
+            session.commit()
+            return len(objects), 0
+        except Exception:
+            session.rollback()
+            logger.exception("Group commit of %d objects failed; retrying individually", len(objects))
+        finally:
+            session.close()
+
+        written = failed = 0
+        for obj in objects:
+            session = SessionLocal()
+            try:
+                self.writer(session, [obj])
+                session.commit()
+                written += 1
+            except Exception:
+                session.rollback()
+                failed += 1
+                logger.exception("Dropping queued %s after failed write", type(obj).__name__)
+            finally:
+                session.close()
+        return written, failed
@@ -0,0 +1,237 @@
+"""Dashboard insights payload and its snapshot cache.
+
+:func:`build_insights` gathers everything ``/api/insights`` returns with a
+handful of conditional-aggregate queries. :class:`InsightsCache` keeps the
+last payload for a configurable TTL (``INSIGHTS_CACHE_TTL`` seconds) so
+dashboards polling from many browser tabs share one computation.
+
+Snapshots are dropped as soon as a transaction that wrote problems, solutions,
+feedback or problem report counters commits through a watched session factory
+(see :func:`watch_sessions`). Writes from other processes, or raw SQL that
+bypasses the ORM, are only picked up once the TTL expires.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import case, event, false, func, select
+
+from . import models
+
+
+# Tables whose writes make a cached snapshot stale
+WATCHED_TABLES = frozenset({
+    models.ProblemIdentification.__tablename__,
+    models.ProblemReportCount.__tablename__,
+    models.SolutionSuggestion.__tablename__,
+    models.ChatbotFeedback.__tablename__,
+})
+
+_WATCHED_MODELS = (
+    models.ProblemIdentification,
+    models.ProblemReportCount,
+    models.SolutionSuggestion,
+    models.ChatbotFeedback,
+)
+
+_DIRTY_KEY = "insights_dirty"
+
+# Bumped on every invalidating commit; snapshots remember the value they saw
+_current_generation = 0
+_generation_lock = threading.Lock()
+
+
+def current_generation() -> int:
+    return _current_generation
+
+
+def invalidate() -> None:
+    """Mark every cached insights snapshot in this process as stale."""
+    global _current_generation
+    with _generation_lock:
+        _current_generation += 1
+
+
+def _after_flush(session, flush_context) -> None:
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _WATCHED_MODELS):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) in WATCHED_TABLES:
+        orm_execute_state.session.info[_DIRTY_KEY] = True
+
+
+def _after_commit(session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate()
+
+
+def _after_soft_rollback(session, previous_transaction) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+
+
+def watch_sessions(session_factory) -> None:
+    """Invalidate snapshots when sessions from ``session_factory`` commit writes."""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_soft_rollback", _after_soft_rollback)
+
+
+class InsightsCache:
+    """Single-flight snapshot of the insights payload with a TTL.
+
+    A ``ttl`` of 0 disables caching. Concurrent callers that miss the cache
+    wait for one rebuild instead of each running the queries.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._payload: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._generation = -1
+
+    def get(self, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        if self.ttl <= 0:
+            return build()
+        with self._lock:
+            if (
+                self._payload is not None
+                and self._generation == current_generation()
+                and time.monotonic() < self._expires_at
+            ):
+                return self._payload
+            # A write committed while building leaves this snapshot stale
+            generation = current_generation()
+            payload = build()
+            self._payload = payload
+            self._generation = generation
+            self._expires_at = time.monotonic() + self.ttl
+            return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payload = None
+
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def build_insights(session, trending_within_days: int = 7, trending_min_reports: int = 2) -> Dict[str, Any]:
+    """Return the ``/api/insights`` payload."""
+    problem = models.ProblemIdentification
+    solution = models.SolutionSuggestion
+    feedback = models.ChatbotFeedback
+
+    # Problem statistics
+    total_problems, active_problems, resolved_problems = session.execute(
+        select(
+            func.count(problem.id),
+            _count_where(problem.status == "identified"),
+            _count_where(problem.status == "resolved"),
+        )
+    ).one()
+
+    # Solution pipeline and ROI of implemented solutions, one row per status
+    pipeline_counts: Dict[str, int] = {}
+    total_savings = 0.0
+    roi_sum, roi_count = 0.0, 0
+    for status, count, savings, status_roi_sum, status_roi_count in session.execute(
+        select(
+            solution.status,
+            func.count(solution.id),
+            func.sum(solution.actual_savings),
+            func.sum(solution.roi_score),
+            func.count(solution.roi_score),
+        ).group_by(solution.status)
+    ):
+        pipeline_counts[status] = count
+        if status == "implemented":
+            total_savings = savings or 0
+            roi_sum, roi_count = status_roi_sum or 0.0, status_roi_count
+    avg_roi = roi_sum / roi_count if roi_count else 0.0
+
+    # Separate filtered queries so each can use its index: the partial index
+    # on unprocessed rows (which needs "= false", not "IS false") and the
+    # timestamp index
+    unprocessed_feedback = session.execute(
+        select(func.count()).select_from(feedback).where(feedback.processed == false())
+    ).scalar()
+    cutoff = datetime.utcnow() - timedelta(days=7)
+    avg_sentiment = session.execute(
+        select(func.avg(feedback.sentiment)).where(feedback.timestamp >= cutoff)
+    ).scalar()
+
+    top_problems = session.execute(
+        select(problem.id, problem.description, problem.frequency_count)
+        .order_by(problem.frequency_count.desc())
+        .limit(5)
+    ).all()
+
+    champion_rows = session.execute(
+        select(feedback.user_id, func.count(feedback.id))
+        .where(feedback.message_type == "success_story")
+        .group_by(feedback.user_id)
+        .order_by(func.count(feedback.id).desc())
+        .limit(5)
+    ).all()
+
+    from .ai_insights import ProblemAggregator
+
+    trending = ProblemAggregator().trending_problems(
+        within_days=trending_within_days, min_reports=trending_min_reports
+    )
+
+    return {
+        "problem_stats": {
+            "total": total_problems,
+            "active": active_problems,
+            "resolved": resolved_problems,
+        },
+        "solution_stats": {
+            "total": sum(pipeline_counts.values()),
+            "implemented": pipeline_counts.get("implemented", 0),
+            "pipeline": pipeline_counts,
+        },
+        "feedback_stats": {
+            "unprocessed": unprocessed_feedback,
+            "sentiment": avg_sentiment or 0.0,
+        },
+        "top_problems": [
+            {
+                "id": pid,
+                "description": description[:100] + "..." if len(description) > 100 else description,
+                "frequency": frequency,
+            }
+            for pid, description, frequency in top_problems
+        ],
+        "trending_problems": [
+            {
+                "id": pid,
+                "description": desc,
+                "frequency": freq,
+            }
+            for pid, desc, freq in trending
+        ],
+        "champions": [
+            {"user_id": uid, "count": cnt}
+            for uid, cnt in champion_rows
+        ],
+        "roi": {
+            "total_savings": total_savings,
+            "average_roi": avg_roi,
+        },
+    }
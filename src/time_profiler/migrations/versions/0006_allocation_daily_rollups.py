@@ -0,0 +1,51 @@
+"""add daily allocation rollup table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_SQL = {
+    'sqlite': """
+        INSERT INTO allocation_daily_rollups (group_id, activity, day, total_hours)
+        SELECT t.group_id, j.key, date(t.timestamp), SUM(CAST(j.value AS FLOAT))
+        FROM time_allocations AS t, json_each(t.activities) AS j
+        GROUP BY t.group_id, j.key, date(t.timestamp)
+    """,
+    'postgresql': """
+        INSERT INTO allocation_daily_rollups (group_id, activity, day, total_hours)
+        SELECT t.group_id, j.key, CAST(t.timestamp AS DATE), SUM(CAST(j.value AS FLOAT))
+        FROM time_allocations AS t, json_each_text(t.activities) AS j
+        GROUP BY t.group_id, j.key, CAST(t.timestamp AS DATE)
+    """,
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'allocation_daily_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('group_id', sa.String(), nullable=False),
+        sa.Column('activity', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('total_hours', sa.Float(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('group_id', 'activity', 'day', name='uq_allocation_daily_rollups_key'),
+    )
+
+    # Other dialects can populate the table with `flask rebuild-rollups`
+    backfill = BACKFILL_SQL.get(op.get_bind().dialect.name)
+    if backfill:
+        op.execute(backfill)
+
+
+def downgrade() -> None:
+    op.drop_table('allocation_daily_rollups')
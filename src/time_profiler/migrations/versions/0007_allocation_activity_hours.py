@@ -0,0 +1,89 @@
+"""add normalized allocation activity hours table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_SQL = {
+    'sqlite': """
+        INSERT INTO allocation_activity_hours (allocation_id, activity, hours)
+        SELECT t.id, j.key, CAST(j.value AS FLOAT)
+        FROM time_allocations AS t, json_each(t.activities) AS j
+    """,
+    'postgresql': """
+        INSERT INTO allocation_activity_hours (allocation_id, activity, hours)
+        SELECT t.id, j.key, CAST(j.value AS FLOAT)
+        FROM time_allocations AS t, json_each_text(t.activities) AS j
+    """,
+}
+
+
+def _backfill_in_python(bind, batch_size: int = 1000) -> None:
+    allocations = sa.table('time_allocations', sa.column('id'), sa.column('activities'))
+    hours = sa.table(
+        'allocation_activity_hours',
+        sa.column('allocation_id'),
+        sa.column('activity'),
+        sa.column('hours'),
+    )
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(allocations.c.id, allocations.c.activities)
+            .where(allocations.c.id > last_id)
+            .order_by(allocations.c.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        rows = []
+        for allocation_id, activities in batch:
+            if isinstance(activities, str):
+                activities = json.loads(activities)
+            for activity, value in (activities or {}).items():
+                rows.append({'allocation_id': allocation_id, 'activity': activity, 'hours': float(value)})
+        if rows:
+            bind.execute(hours.insert(), rows)
+        last_id = batch[-1][0]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'allocation_activity_hours',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'allocation_id',
+            sa.Integer(),
+            sa.ForeignKey('time_allocations.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('activity', sa.String(), nullable=False),
+        sa.Column('hours', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_allocation_activity_hours_allocation_id', 'allocation_activity_hours', ['allocation_id'])
+    op.create_index('ix_allocation_activity_hours_activity', 'allocation_activity_hours', ['activity'])
+
+    bind = op.get_bind()
+    backfill = BACKFILL_SQL.get(bind.dialect.name)
+    if backfill:
+        op.execute(backfill)
+    else:
+        _backfill_in_python(bind)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_allocation_activity_hours_activity', table_name='allocation_activity_hours')
+    op.drop_index('ix_allocation_activity_hours_allocation_id', table_name='allocation_activity_hours')
+    op.drop_table('allocation_activity_hours')
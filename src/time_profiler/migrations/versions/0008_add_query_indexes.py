@@ -0,0 +1,48 @@
+"""add indexes for hot query paths
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_time_allocations_group_id_timestamp', 'time_allocations', ['group_id', 'timestamp']),
+    ('ix_time_allocations_timestamp', 'time_allocations', ['timestamp']),
+    ('ix_user_submission_history_user_type_ts', 'user_submission_history', ['user_id', 'submission_type', 'timestamp']),
+    ('ix_chatbot_feedback_timestamp', 'chatbot_feedback', ['timestamp']),
+    ('ix_chatbot_feedback_type_user', 'chatbot_feedback', ['message_type', 'user_id']),
+    ('ix_problem_identification_status', 'problem_identification', ['status']),
+    ('ix_problem_identification_last_reported', 'problem_identification', ['last_reported']),
+    ('ix_problem_identification_frequency_count', 'problem_identification', ['frequency_count']),
+    ('ix_jira_ticket_lifecycle_ticket_key', 'jira_ticket_lifecycle', ['ticket_key']),
+    ('ix_jira_ticket_lifecycle_problem_status', 'jira_ticket_lifecycle', ['problem_id', 'status']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+    # Partial index: only unprocessed feedback is queried by processed flag
+    op.create_index(
+        'ix_chatbot_feedback_unprocessed',
+        'chatbot_feedback',
+        ['timestamp'],
+        postgresql_where=sa.text('processed = false'),
+        sqlite_where=sa.text('processed = 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chatbot_feedback_unprocessed', table_name='chatbot_feedback')
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
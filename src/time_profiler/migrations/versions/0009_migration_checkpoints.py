@@ -0,0 +1,27 @@
+"""add migration checkpoints table
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'migration_checkpoints',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('last_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('migration_checkpoints')
@@ -0,0 +1,43 @@
+"""add per-day problem report counters
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'problem_report_counts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'problem_id',
+            sa.Integer(),
+            sa.ForeignKey('problem_identification.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('report_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('problem_id', 'day', name='uq_problem_report_counts_key'),
+    )
+    op.create_index('ix_problem_report_counts_day', 'problem_report_counts', ['day'])
+
+    # Per-day history was never stored; seed one report on each problem's last report day
+    day = 'date(last_reported)' if op.get_bind().dialect.name == 'sqlite' else 'CAST(last_reported AS DATE)'
+    op.execute(
+        'INSERT INTO problem_report_counts (problem_id, day, report_count) '
+        f'SELECT id, {day}, 1 FROM problem_identification'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_problem_report_counts_day', table_name='problem_report_counts')
+    op.drop_table('problem_report_counts')
@@ -0,0 +1,23 @@
+"""add sentiment column to chatbot feedback
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows are scored with `flask backfill-sentiment`
+    op.add_column('chatbot_feedback', sa.Column('sentiment', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chatbot_feedback', 'sentiment')
@@ -0,0 +1,35 @@
+"""add chatbot conversation states table
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'chatbot_conversation_states',
+        sa.Column('user_id', sa.String(), primary_key=True),
+        sa.Column('current_flow', sa.String(), nullable=True),
+        sa.Column('context', sa.JSON(), nullable=False),
+        sa.Column('last_activity', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    )
+    op.create_index(
+        'ix_chatbot_conversation_states_last_activity',
+        'chatbot_conversation_states',
+        ['last_activity'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chatbot_conversation_states_last_activity', table_name='chatbot_conversation_states')
+    op.drop_table('chatbot_conversation_states')
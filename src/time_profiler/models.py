@@ -1,5 +1,8 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, JSON, Boolean, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Date, DateTime, Text, Float, JSON, Boolean, ForeignKey,
+    Index, UniqueConstraint, text,
+)
 from sqlalchemy.orm import relationship
 
 from .app import Base
@@ -29,6 +32,10 @@ class TimeAllocation(Base):
     """SQLAlchemy model representing a complete time allocation entry per person/department."""
     
     __tablename__ = "time_allocations"
+    __table_args__ = (
+        Index("ix_time_allocations_group_id_timestamp", "group_id", "timestamp"),
+        Index("ix_time_allocations_timestamp", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True)
     group_id = Column(String, nullable=False)
@@ -43,10 +50,53 @@ class TimeAllocation(Base):
         )
 
 
+class AllocationActivityHours(Base):
+    """Normalized hours per activity for a single TimeAllocation entry."""
+
+    __tablename__ = "allocation_activity_hours"
+
+    id = Column(Integer, primary_key=True)
+    allocation_id = Column(
+        Integer, ForeignKey("time_allocations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    activity = Column(String, nullable=False, index=True)
+    hours = Column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<AllocationActivityHours allocation_id={self.allocation_id} "
+            f"activity={self.activity} hours={self.hours}>"
+        )
+
+
+class AllocationDailyRollup(Base):
+    """Pre-summed TimeAllocation hours per group, activity and day."""
+
+    __tablename__ = "allocation_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("group_id", "activity", "day", name="uq_allocation_daily_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(String, nullable=False)
+    activity = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    total_hours = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<AllocationDailyRollup group_id={self.group_id} activity={self.activity} "
+            f"day={self.day} total_hours={self.total_hours}>"
+        )
+
+
 class UserSubmissionHistory(Base):
     """Track version/timestamp of each submission for temporal data management."""
     
     __tablename__ = "user_submission_history"
+    __table_args__ = (
+        Index("ix_user_submission_history_user_type_ts", "user_id", "submission_type", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)  # User identifier (can be group_id for now)
@@ -68,11 +118,22 @@ class ChatbotFeedback(Base):
     """Store chatbot interactions and feedback from users."""
     
     __tablename__ = "chatbot_feedback"
+    __table_args__ = (
+        Index("ix_chatbot_feedback_timestamp", "timestamp"),
+        Index("ix_chatbot_feedback_type_user", "message_type", "user_id"),
+        Index(
+            "ix_chatbot_feedback_unprocessed",
+            "timestamp",
+            postgresql_where=text("processed = false"),
+            sqlite_where=text("processed = 0"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     message_text = Column(Text, nullable=False)
     message_type = Column(String, nullable=False)  # "time_allocation", "problem_report", "success_story"
+    sentiment = Column(Float, nullable=True)  # VADER compound score (-1.0 to 1.0), set on ingest
     processed = Column(Boolean, nullable=False, default=False)
     archived = Column(Boolean, nullable=False, default=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -89,6 +150,11 @@ class ProblemIdentification(Base):
     """Store identified problems from chatbot analysis."""
     
     __tablename__ = "problem_identification"
+    __table_args__ = (
+        Index("ix_problem_identification_status", "status"),
+        Index("ix_problem_identification_last_reported", "last_reported"),
+        Index("ix_problem_identification_frequency_count", "frequency_count"),
+    )
     
     id = Column(Integer, primary_key=True)
     description = Column(Text, nullable=False)
@@ -105,6 +171,27 @@ class ProblemIdentification(Base):
         )
 
 
+class ProblemReportCount(Base):
+    """Number of reports received for a problem on a given day."""
+
+    __tablename__ = "problem_report_counts"
+    __table_args__ = (
+        UniqueConstraint("problem_id", "day", name="uq_problem_report_counts_key"),
+        Index("ix_problem_report_counts_day", "day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problem_identification.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    report_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ProblemReportCount problem_id={self.problem_id} day={self.day} "
+            f"count={self.report_count}>"
+        )
+
+
 class SolutionSuggestion(Base):
     """Store AI-generated solution suggestions for identified problems."""
     
@@ -135,6 +222,10 @@ class JiraTicketLifecycle(Base):
     """Track Jira ticket lifecycle for problems and solutions."""
     
     __tablename__ = "jira_ticket_lifecycle"
+    __table_args__ = (
+        Index("ix_jira_ticket_lifecycle_ticket_key", "ticket_key"),
+        Index("ix_jira_ticket_lifecycle_problem_status", "problem_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True)
     problem_id = Column(Integer, ForeignKey("problem_identification.id"), nullable=False)
@@ -176,3 +267,34 @@ class SubmissionSummary(Base):
             f"<SubmissionSummary id={self.id} user_id={self.user_id} "
             f"type={self.submission_type}>"
         )
+
+
+class MigrationCheckpoint(Base):
+    """Persisted watermark for resumable, chunked data migrations."""
+
+    __tablename__ = "migration_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<MigrationCheckpoint name={self.name} last_id={self.last_id}>"
+
+
+class ChatbotConversationState(Base):
+    """Shared conversation state for multi-worker chatbot deployments."""
+
+    __tablename__ = "chatbot_conversation_states"
+    __table_args__ = (
+        Index("ix_chatbot_conversation_states_last_activity", "last_activity"),
+    )
+
+    user_id = Column(String, primary_key=True)
+    current_flow = Column(String, nullable=True)
+    context = Column(JSON, nullable=False, default=dict)
+    last_activity = Column(DateTime, default=datetime.utcnow, nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self) -> str:
+        return f"<ChatbotConversationState user={self.user_id} version={self.version}>"
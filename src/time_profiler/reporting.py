@@ -0,0 +1,243 @@
+"""Database-side aggregation helpers for the results dashboard."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import models
+
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE
+_UPSERT_INSERT = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _dialect_name(session) -> str:
+    return session.get_bind().dialect.name
+
+
+def upsert_increment(session, model, key_columns: Sequence[str], counter: str, rows: List[Dict[str, Any]]) -> None:
+    """Insert ``rows`` into ``model``, adding ``counter`` to rows whose key already exists.
+
+    Uses a single ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and
+    PostgreSQL (``key_columns`` must be unique there) and a per-row lookup
+    elsewhere. The caller commits.
+    """
+    if not rows:
+        return
+    insert_fn = _UPSERT_INSERT.get(_dialect_name(session))
+    if insert_fn is not None:
+        table = model.__table__
+        stmt = insert_fn(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={counter: table.c[counter] + stmt.excluded[counter]},
+        )
+        session.execute(stmt)
+        return
+
+    for values in rows:
+        row = session.query(model).filter_by(**{c: values[c] for c in key_columns}).first()
+        if row:
+            setattr(row, counter, getattr(row, counter) + values[counter])
+        else:
+            session.add(model(**values))
+
+
+def _apply_filters(query, model, group_id: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    if group_id:
+        query = query.where(model.group_id == group_id)
+    if start:
+        query = query.where(model.timestamp >= start)
+    if end:
+        query = query.where(model.timestamp <= end)
+    return query
+
+
+def allocation_activity_totals(
+    session,
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Tuple[str, str, float]]:
+    """Return ``(group_id, activity, total_hours)`` summed over TimeAllocation rows.
+
+    Sums the normalized ``allocation_activity_hours`` rows in SQL so only the
+    aggregated rows leave the database.
+    """
+    model = models.TimeAllocation
+    hours = models.AllocationActivityHours
+    query = (
+        select(model.group_id, hours.activity, func.sum(hours.hours))
+        .join(hours, hours.allocation_id == model.id)
+    )
+    query = _apply_filters(query, model, group_id, start, end)
+    query = query.group_by(model.group_id, hours.activity).order_by(model.group_id, hours.activity)
+    return [(gid, activity, float(total or 0)) for gid, activity, total in session.execute(query)]
+
+
+def has_time_allocations(
+    session,
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> bool:
+    """Return True if any TimeAllocation row matches the filters."""
+    model = models.TimeAllocation
+    query = _apply_filters(select(model.id), model, group_id, start, end).limit(1)
+    return session.execute(query).first() is not None
+
+
+def activity_log_counts(
+    session,
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Tuple[str, str, int]]:
+    """Return ``(group_id, activity, count)`` for legacy ActivityLog rows."""
+    model = models.ActivityLog
+    query = select(model.group_id, model.activity, func.count(model.id))
+    query = _apply_filters(query, model, group_id, start, end)
+    query = query.group_by(model.group_id, model.activity).order_by(model.group_id, model.activity)
+    return [tuple(row) for row in session.execute(query)]
+
+
+# ---------------------------------------------------------------------------
+# Derived allocation tables
+# ---------------------------------------------------------------------------
+
+
+def record_new_allocations(session, allocations: Iterable[models.TimeAllocation]) -> None:
+    """Write the derived rows for newly added TimeAllocation entries.
+
+    Flushes ``allocations`` so ids and timestamps are assigned, then inserts
+    their normalized ``allocation_activity_hours`` rows and updates the daily
+    rollups, all inside the caller's transaction. The caller commits.
+    """
+    allocations = list(allocations)
+    session.flush()
+    insert_allocation_hours(session, allocations)
+    update_allocation_rollups(session, allocations)
+
+
+def insert_allocation_hours(session, allocations: Iterable[models.TimeAllocation]) -> None:
+    """Bulk insert one ``allocation_activity_hours`` row per activity."""
+    rows = [
+        {"allocation_id": allocation.id, "activity": activity, "hours": float(hours)}
+        for allocation in allocations
+        for activity, hours in (allocation.activities or {}).items()
+    ]
+    if rows:
+        session.execute(insert(models.AllocationActivityHours), rows)
+
+
+def update_allocation_rollups(session, allocations: Iterable[models.TimeAllocation]) -> None:
+    """Add the hours of newly inserted allocations to the daily rollup table.
+
+    Must be called inside the transaction that inserts ``allocations`` (after
+    a flush, so timestamps are populated) so the rollup never drifts from
+    ``time_allocations``; :func:`record_new_allocations` does this. The caller
+    is responsible for committing.
+    """
+    increments: Dict[Tuple[str, str, date], float] = defaultdict(float)
+    for allocation in allocations:
+        day = (allocation.timestamp or datetime.utcnow()).date()
+        for activity, hours in (allocation.activities or {}).items():
+            increments[(allocation.group_id, activity, day)] += float(hours)
+    if not increments:
+        return
+
+    upsert_increment(
+        session,
+        models.AllocationDailyRollup,
+        ["group_id", "activity", "day"],
+        "total_hours",
+        [
+            {"group_id": gid, "activity": act, "day": day, "total_hours": hours}
+            for (gid, act, day), hours in increments.items()
+        ],
+    )
+
+
+def rebuild_allocation_rollups(session) -> int:
+    """Recompute the daily rollup table from ``allocation_activity_hours``.
+
+    Returns the number of rollup rows written. The caller commits.
+    """
+    rollup = models.AllocationDailyRollup
+    model = models.TimeAllocation
+    hours = models.AllocationActivityHours
+    session.execute(delete(rollup))
+
+    # SQLite has no DATE type; date() yields the same ISO text SQLAlchemy stores
+    if _dialect_name(session) == "sqlite":
+        day = func.date(model.timestamp)
+    else:
+        day = cast(model.timestamp, Date)
+    source = (
+        select(model.group_id, hours.activity, day, func.sum(hours.hours))
+        .join(hours, hours.allocation_id == model.id)
+        .group_by(model.group_id, hours.activity, day)
+    )
+    session.execute(
+        insert(rollup).from_select(["group_id", "activity", "day", "total_hours"], source)
+    )
+    return session.query(rollup).count()
+
+
+def _rollup_totals(session, group_id: Optional[str], first_day: Optional[date], end_day: Optional[date]):
+    rollup = models.AllocationDailyRollup
+    query = select(rollup.group_id, rollup.activity, func.sum(rollup.total_hours))
+    if group_id:
+        query = query.where(rollup.group_id == group_id)
+    if first_day:
+        query = query.where(rollup.day >= first_day)
+    if end_day:
+        query = query.where(rollup.day < end_day)
+    query = query.group_by(rollup.group_id, rollup.activity)
+    return session.execute(query)
+
+
+def rollup_activity_totals(
+    session,
+    group_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Tuple[str, str, float]]:
+    """Same result as :func:`allocation_activity_totals`, read from daily rollups.
+
+    Days lying entirely inside ``[start, end]`` are read from the rollup
+    table; partial days at either edge of the range are summed from
+    ``time_allocations`` so results match the raw timestamp filter exactly.
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    end_day = end.date() if end is not None else None  # exclusive
+
+    if first_day is not None and end_day is not None and first_day >= end_day:
+        return allocation_activity_totals(session, group_id, start, end)
+
+    totals: Dict[Tuple[str, str], float] = defaultdict(float)
+    for gid, activity, hours in _rollup_totals(session, group_id, first_day, end_day):
+        totals[(gid, activity)] += float(hours or 0)
+
+    edges = []
+    if start is not None and start.time() != time.min:
+        edges.append((start, datetime.combine(first_day, time.min) - _ONE_MICROSECOND))
+    if end is not None:
+        edges.append((datetime.combine(end_day, time.min), end))
+    for edge_start, edge_end in edges:
+        for gid, activity, hours in allocation_activity_totals(session, group_id, edge_start, edge_end):
+            totals[(gid, activity)] += hours
+
+    return [(gid, activity, hours) for (gid, activity), hours in sorted(totals.items())]
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 from . import create_app, SessionLocal, models
+from .reporting import record_new_allocations
 
 
 def seed_allocation_from_file(data_path: Path, db_url: str | None = None) -> None:
@@ -15,6 +16,7 @@ def seed_allocation_from_file(data_path: Path, db_url: str | None = None) -> Non
 
     session = SessionLocal()
     try:
+        allocations = []
         for item in entries:
             allocation = models.TimeAllocation(
                 group_id=item["group_id"],
@@ -22,6 +24,8 @@ def seed_allocation_from_file(data_path: Path, db_url: str | None = None) -> Non
                 feedback=item.get("feedback"),
             )
             session.add(allocation)
+            allocations.append(allocation)
+        record_new_allocations(session, allocations)
         session.commit()
         print(f"Successfully added {len(entries)} time allocation entries")
     finally:
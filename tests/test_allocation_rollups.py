@@ -0,0 +1,99 @@
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from time_profiler import create_app, SessionLocal, models
+from time_profiler.app import load_config
+from time_profiler.reporting import (
+    allocation_activity_totals,
+    rebuild_allocation_rollups,
+    record_new_allocations,
+    rollup_activity_totals,
+    upsert_increment,
+)
+
+
+def setup_app(tmp_path):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({"TESTING": True, "DATABASE_URL": db_url})
+    return app
+
+
+def test_submit_allocation_updates_rollup(tmp_path):
+    app = setup_app(tmp_path)
+    client = app.test_client()
+
+    config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
+    group_id = config["groups"][0]["id"]
+    activity = config["activities"][0]["category"]
+
+    client.post("/api/submit-allocation", json={"group_id": group_id, "activities": {activity: 4}})
+    client.post("/api/submit-allocation", json={"group_id": group_id, "activities": {activity: 6}})
+
+    session = SessionLocal()
+    rows = session.query(models.AllocationDailyRollup).all()
+    session.close()
+    assert len(rows) == 1
+    assert rows[0].group_id == group_id
+    assert rows[0].activity == activity
+    assert rows[0].total_hours == 10
+
+
+def test_rebuild_and_partial_day_ranges(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    allocations = [
+        models.TimeAllocation(group_id="g1", activities={"Meeting": 1}, timestamp=datetime(2024, 1, 1, 9)),
+        models.TimeAllocation(group_id="g1", activities={"Meeting": 2}, timestamp=datetime(2024, 1, 2, 9)),
+        models.TimeAllocation(group_id="g1", activities={"Meeting": 4, "Research": 1}, timestamp=datetime(2024, 1, 3, 9)),
+        models.TimeAllocation(group_id="g2", activities={"Research": 8}, timestamp=datetime(2024, 1, 3, 18)),
+    ]
+    session.add_all(allocations)
+    record_new_allocations(session, allocations)
+    session.commit()
+    assert session.query(models.AllocationActivityHours).count() == 5
+
+    incremental = sorted(
+        (r.group_id, r.activity, r.day, r.total_hours)
+        for r in session.query(models.AllocationDailyRollup).all()
+    )
+    assert rebuild_allocation_rollups(session) == 5
+    session.commit()
+    rebuilt = sorted(
+        (r.group_id, r.activity, r.day, r.total_hours)
+        for r in session.query(models.AllocationDailyRollup).all()
+    )
+    assert rebuilt == incremental
+
+    ranges = [
+        (None, None),
+        (datetime(2024, 1, 2), None),
+        (datetime(2024, 1, 1, 12), datetime(2024, 1, 3, 12)),
+        (datetime(2024, 1, 3, 8), datetime(2024, 1, 3, 10)),
+        (None, datetime(2024, 1, 3)),
+    ]
+    for start, end in ranges:
+        expected = allocation_activity_totals(session, None, start, end)
+        assert rollup_activity_totals(session, None, start, end) == expected
+    assert rollup_activity_totals(session, "g2") == [("g2", "Research", 8.0)]
+    session.close()
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "other"])
+def test_upsert_increment_adds_to_existing_rows(tmp_path, monkeypatch, dialect):
+    app = setup_app(tmp_path)
+    # "other" exercises the per-row fallback used without ON CONFLICT support
+    monkeypatch.setattr("time_profiler.reporting._dialect_name", lambda session: dialect)
+    rollup = models.AllocationDailyRollup
+    key = {"group_id": "g1", "activity": "Meeting", "day": date(2024, 1, 1)}
+
+    session = SessionLocal()
+    upsert_increment(session, rollup, list(key), "total_hours", [{**key, "total_hours": 2.0}])
+    session.commit()
+    upsert_increment(session, rollup, list(key), "total_hours", [{**key, "total_hours": 1.5}])
+    session.commit()
+
+    assert [r.total_hours for r in session.query(rollup).filter_by(**key)] == [3.5]
+    session.close()
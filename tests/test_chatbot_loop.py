@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from time_profiler import create_app, SessionLocal
+from time_profiler.chatbot.adapters import WebChatAdapter
+from time_profiler.chatbot.runtime import EventLoopThread
+
+
+def setup_app(tmp_path):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({"TESTING": True, "DATABASE_URL": db_url})
+    return app
+
+
+class SlowAdapter(WebChatAdapter):
+    """Web adapter whose outbound send waits on the network."""
+
+    def __init__(self):
+        self.loops = set()
+
+    async def send_message(self, user_id, response):
+        self.loops.add(asyncio.get_running_loop())
+        await asyncio.sleep(0.2)
+        return True
+
+
+def test_event_loop_thread_runs_coroutines_concurrently():
+    loop_thread = EventLoopThread()
+    try:
+        started = time.perf_counter()
+        futures = [loop_thread.submit(asyncio.sleep(0.1, result=i)) for i in range(50)]
+        assert [f.result(5) for f in futures] == list(range(50))
+        assert time.perf_counter() - started < 1.0
+    finally:
+        loop_thread.close()
+    assert not loop_thread.running
+
+
+def test_teams_messages_share_one_loop(tmp_path):
+    app = setup_app(tmp_path)
+    adapter = SlowAdapter()
+    app.extensions["chatbot_service"].register_adapter("teams", adapter)
+
+    results = []
+
+    def post(i):
+        client = app.test_client()
+        resp = client.post(
+            "/api/teams/messages",
+            json={"user_id": f"u{i}", "text": "hello", "timestamp": datetime.utcnow().isoformat()},
+        )
+        results.append(resp.status_code)
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [200] * 5
+    assert adapter.loops == {app.extensions["chatbot_loop"].loop}
+
+
+def test_teams_message_timeout(tmp_path):
+    app = setup_app(tmp_path)
+    app.config["CHATBOT_RESPONSE_TIMEOUT"] = 0.05
+    app.extensions["chatbot_service"].register_adapter("teams", SlowAdapter())
+
+    resp = app.test_client().post("/api/teams/messages", json={"user_id": "u1", "text": "hello"})
+    assert resp.status_code == 504
+
+
+def test_database_writes_run_off_the_loop(tmp_path, monkeypatch):
+    app = setup_app(tmp_path)
+    service = app.extensions["chatbot_service"]
+    loop_thread = app.extensions["chatbot_loop"]
+    adapter = SlowAdapter()
+    service.register_adapter("teams", adapter)
+
+    write_threads = []
+    original = service._write_chatbot_feedback
+
+    def slow_write(message):
+        write_threads.append(threading.current_thread().name)
+        time.sleep(0.3)
+        original(message)
+
+    monkeypatch.setattr(service, "_write_chatbot_feedback", slow_write)
+
+    ticks = []
+
+    async def heartbeat():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    message = loop_thread.submit(service.process_message("teams", {"user_id": "u1", "text": "hello"}))
+    loop_thread.run(heartbeat(), timeout=5)
+    message.result(5)
+
+    assert write_threads and all(name.startswith("chatbot-db") for name in write_threads)
+    # The heartbeat kept its cadence while the write was in progress
+    assert ticks[-1] - ticks[0] < 0.3
+
+    stats = app.test_client().get("/api/admin/chatbot-stats").get_json()["stages"]
+    assert stats["store_feedback"]["count"] == 1
+    assert stats["store_feedback"]["avg_ms"] >= 300
+    for stage in ("authenticate", "parse", "classify", "handle.general", "send", "total"):
+        assert stats[stage]["count"] == 1
+
+
+class RecordingAdapter(WebChatAdapter):
+    """Web adapter logging when each reply starts and finishes sending."""
+
+    def __init__(self):
+        self.events = []
+
+    async def send_message(self, user_id, response):
+        self.events.append(("start", user_id))
+        await asyncio.sleep(0.1)
+        self.events.append(("end", user_id))
+        return True
+
+
+def test_messages_ordered_per_user_and_parallel_across_users(tmp_path):
+    app = setup_app(tmp_path)
+    service = app.extensions["chatbot_service"]
+    adapter = RecordingAdapter()
+    service.register_adapter("web", adapter)
+    received = []
+    original = service._store_chatbot_feedback
+
+    async def store(message):
+        received.append((message.user_id, message.text))
+        await original(message)
+
+    service._store_chatbot_feedback = store
+
+    async def main():
+        messages = [{"user_id": "u1", "text": f"m{i}"} for i in range(3)]
+        messages += [{"user_id": "u2", "text": "hello"}]
+        return await asyncio.gather(*(service.process_message("web", m) for m in messages))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - started
+
+    assert [text for user, text in received if user == "u1"] == ["m0", "m1", "m2"]
+    u1_events = [kind for kind, user in adapter.events if user == "u1"]
+    assert u1_events == ["start", "end"] * 3
+    # u2 did not queue behind u1's replies
+    assert adapter.events.index(("start", "u2")) < adapter.events.index(("end", "u1"))
+    assert elapsed < 0.45
+    assert service.load_stats()["in_flight"] == 0
+    assert service.load_stats()["active_users"] == 0
+
+
+def test_busy_response_when_too_many_messages_in_flight(tmp_path):
+    app = setup_app(tmp_path)
+    service = app.extensions["chatbot_service"]
+    adapter = RecordingAdapter()
+    service.register_adapter("teams", adapter)
+    service.max_in_flight = 2
+
+    async def main():
+        return await asyncio.gather(*(
+            service.process_message("teams", {"user_id": f"u{i}", "text": "hello"}) for i in range(3)
+        ))
+
+    responses = asyncio.run(main())
+    assert [r.message_type for r in responses].count("busy") == 1
+    assert service.load_stats()["rejected"] == 1
+
+    service.max_in_flight = 0
+    resp = app.test_client().post("/api/teams/messages", json={"user_id": "u1", "text": "hello"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert app.test_client().get("/api/admin/chatbot-stats").get_json()["load"]["rejected"] == 2
@@ -0,0 +1,53 @@
+import json
+import os
+from pathlib import Path
+
+from time_profiler.app import load_config
+from time_profiler.config_registry import ConfigRegistry, get_config_registry
+
+
+EXAMPLE_CONFIG = Path(__file__).resolve().parents[1] / "config" / "dcri_config.json.example"
+
+
+def write_config(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_snapshot_lookups_match_config():
+    config = load_config(EXAMPLE_CONFIG)
+    snapshot = ConfigRegistry(EXAMPLE_CONFIG).get()
+
+    assert snapshot.groups == {g["id"] for g in config["groups"]}
+    first = config["activities"][0]
+    assert snapshot.activities[first["category"]] == set(first["sub_activities"])
+    assert snapshot.parents[config["groups"][0]["id"]] == config["groups"][0]["parent"]
+    assert snapshot.enable_free_text_feedback == bool(config.get("enableFreeTextFeedback"))
+
+
+def test_registry_reuses_snapshot_until_file_changes(tmp_path):
+    path = tmp_path / "config.json"
+    data = {"groups": [{"id": "g1", "parent": None}], "activities": []}
+    write_config(path, data, mtime_ns=1_000_000_000)
+    registry = ConfigRegistry(path)
+
+    first = registry.get()
+    assert registry.get() is first
+
+    # Touching the file without changing content keeps the same snapshot
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert registry.get() is first
+
+    data["groups"].append({"id": "g2", "parent": "g1"})
+    write_config(path, data, mtime_ns=3_000_000_000)
+    second = registry.get()
+    assert second is not first
+    assert second.groups == {"g1", "g2"}
+    assert second.version != first.version
+
+
+def test_shared_registry_per_path(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, {"groups": [], "activities": []})
+    assert get_config_registry(path) is get_config_registry(str(path))
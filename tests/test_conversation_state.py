@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from time_profiler import create_app, SessionLocal
+from time_profiler.chatbot.base import BaseChatbotService
+from time_profiler.chatbot.state import (
+    ConversationState,
+    ConversationStateStore,
+    DatabaseStateBackend,
+    MemoryStateBackend,
+    StaleConversationState,
+)
+
+
+def setup_app(tmp_path):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({"TESTING": True, "DATABASE_URL": db_url})
+    return app
+
+
+def test_state_uses_slots():
+    state = ConversationState("u1")
+    with pytest.raises(AttributeError):
+        state.extra = 1
+    assert not hasattr(state, "__dict__")
+
+
+def test_store_evicts_least_recently_used():
+    store = ConversationStateStore(max_states=3, idle_ttl=3600)
+    for user in ("u1", "u2", "u3"):
+        store.get_or_create(user)
+    store.get_or_create("u1").update_context("step", 2)
+    store.get_or_create("u4")
+
+    assert "u2" not in store
+    assert set(store) == {"u1", "u3", "u4"}
+    assert store.get("u1").get_context("step") == 2
+    stats = store.stats()
+    assert stats["live"] == 3
+    assert stats["created"] == 4
+    assert stats["hits"] == 1
+    assert stats["evicted_lru"] == 1
+
+
+def test_store_evicts_idle_states():
+    store = ConversationStateStore(max_states=100, idle_ttl=60)
+    states = [store.get_or_create(f"u{i}") for i in range(10)]
+    idle_since = datetime.utcnow() - timedelta(seconds=120)
+    for state in states[:5]:
+        state.last_activity = idle_since
+
+    assert store.sweep() == 5
+    assert len(store) == 5
+    assert store.stats()["evicted_idle"] == 5
+    # A returning user starts a fresh conversation
+    assert store.get_or_create("u0").get_context("step") is None
+
+
+def test_service_memory_stays_bounded():
+    service = BaseChatbotService(max_conversation_states=50)
+    for i in range(1000):
+        service.save_conversation_state(service.get_conversation_state(f"user{i}"))
+    assert service.conversation_states.stats()["live"] == 50
+    assert service.conversation_states.stats()["evicted_lru"] == 950
+
+
+def test_chatbot_stats_endpoint(tmp_path):
+    app = setup_app(tmp_path)
+    service = app.extensions["chatbot_service"]
+    service.save_conversation_state(service.get_conversation_state("u1"))
+    data = app.test_client().get("/api/admin/chatbot-stats").get_json()
+    assert data["conversations"]["live"] == 1
+
+
+def _exercise_backend(backend):
+    first = backend.get_or_create("u1")
+    first.current_flow = "time_allocation"
+    first.update_context("step", 1)
+    backend.save(first)
+    assert first.version == 1
+
+    # Two workers load the same version; the second save loses
+    worker_a = backend.load("u1")
+    worker_b = backend.load("u1")
+    assert worker_a.get_context("step") == 1
+    worker_a.update_context("step", 2)
+    backend.save(worker_a)
+    worker_b.update_context("step", 3)
+    with pytest.raises(StaleConversationState):
+        backend.save(worker_b)
+
+    stored = backend.load("u1")
+    assert stored.current_flow == "time_allocation"
+    assert stored.get_context("step") == 2
+    assert stored.version == 2
+
+    # Concurrent creation of a new state also conflicts
+    new_a, new_b = backend.get_or_create("u2"), backend.get_or_create("u2")
+    backend.save(new_a)
+    with pytest.raises(StaleConversationState):
+        backend.save(new_b)
+
+    updated = backend.update("u1", lambda s: s.update_context("step", s.get_context("step") + 1))
+    assert updated.version == 3
+    assert backend.load("u1").get_context("step") == 3
+
+    backend.delete("u1")
+    assert backend.load("u1") is None
+
+
+def test_memory_backend_versioning():
+    _exercise_backend(MemoryStateBackend())
+
+
+def test_database_backend_versioning(tmp_path):
+    setup_app(tmp_path)
+    backend = DatabaseStateBackend(idle_ttl=60)
+    _exercise_backend(backend)
+    assert backend.stats()["conflicts"] == 2
+
+    # Two workers sharing the table see each other's flow
+    other_worker = DatabaseStateBackend(idle_ttl=60)
+    state = backend.get_or_create("u3")
+    state.current_flow = "problem_report"
+    backend.save(state)
+    assert other_worker.load("u3").current_flow == "problem_report"
+
+
+def test_database_backend_expires_idle_rows(tmp_path):
+    from time_profiler import models
+
+    setup_app(tmp_path)
+    backend = DatabaseStateBackend(idle_ttl=60)
+    backend.save(backend.get_or_create("u1"))
+    session = SessionLocal()
+    session.query(models.ChatbotConversationState).update(
+        {"last_activity": datetime.utcnow() - timedelta(seconds=120)}
+    )
+    session.commit()
+    session.close()
+
+    assert backend.load("u1") is None
+    # A fresh conversation replaces the expired row
+    backend.save(backend.get_or_create("u1"))
+    assert backend.load("u1").version == 1
+    assert backend.purge_idle() == 0
+
+
+@pytest.mark.parametrize("backend", ["memory", "database"])
+def test_multi_turn_flow_persists_state(tmp_path, backend):
+    import asyncio
+
+    from time_profiler import models
+    from time_profiler.chatbot.adapters import WebChatAdapter
+    from time_profiler.chatbot.state import create_state_backend
+
+    setup_app(tmp_path)
+    # Two services sharing one backend stand in for two workers
+    shared = create_state_backend(backend)
+    first, second = BaseChatbotService(state_backend=shared), BaseChatbotService(state_backend=shared)
+    for service in (first, second):
+        service.register_adapter("web", WebChatAdapter())
+
+    reply = asyncio.run(first.process_message("web", {"user_id": "u1", "text": "Can I log my time allocation?"}))
+    assert "percentage" in reply.text
+    assert shared.load("u1").current_flow == "time_allocation"
+
+    reply = asyncio.run(second.process_message("web", {"user_id": "u1", "text": "I spent 50% meetings, 50% research"}))
+    assert "recorded" in reply.text
+    assert shared.load("u1").current_flow is None
+
+    session = SessionLocal()
+    assert session.query(models.TimeAllocation).one().activities == {"Meeting": 50, "Research": 50}
+    session.close()
+
+
+def test_stale_state_after_commit_keeps_the_reply(tmp_path):
+    import asyncio
+
+    from time_profiler import models
+    from time_profiler.chatbot.adapters import WebChatAdapter
+
+    setup_app(tmp_path)
+    backend = MemoryStateBackend()
+    service = BaseChatbotService(state_backend=backend)
+    service.register_adapter("web", WebChatAdapter())
+    asyncio.run(service.process_message("web", {"user_id": "u1", "text": "Can I log my time allocation?"}))
+
+    original = service._write_time_allocation
+
+    def write_then_race(group_id, allocations):
+        original(group_id, allocations)
+        # Another worker saves the state while the allocation commits
+        backend.update("u1", lambda state: state.update_context("other", True))
+
+    service._write_time_allocation = write_then_race
+    reply = asyncio.run(service.process_message("web", {"user_id": "u1", "text": "I spent 50% meetings, 50% research"}))
+
+    assert "recorded" in reply.text
+    session = SessionLocal()
+    assert session.query(models.TimeAllocation).count() == 1
+    session.close()
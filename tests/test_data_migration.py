@@ -1,6 +1,18 @@
+import csv
+import io
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
 from time_profiler import create_app, SessionLocal
 from time_profiler import models
-from time_profiler.data_migration import migrate_activity_logs_to_time_allocations
+from time_profiler.data_migration import (
+    export_time_allocations,
+    migrate_activity_logs_to_time_allocations,
+)
+from time_profiler.reporting import record_new_allocations
 
 
 def setup_app(tmp_path):
@@ -26,3 +38,104 @@ def test_migrate_activity_logs(tmp_path):
     assert allocations
     assert allocations[0].activities["Dev"] == 2.0
 
+
+def test_export_time_allocations(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    allocations = [
+        models.TimeAllocation(group_id="g1", activities={"Meeting": 5, "Research": 2.5}),
+        models.TimeAllocation(group_id="g1", activities={}),
+    ]
+    session.add_all(allocations)
+    record_new_allocations(session, allocations)
+    # Written directly, without derived allocation_activity_hours rows
+    session.add(models.TimeAllocation(group_id="g2", activities={"Analysis": 8}))
+    session.commit()
+    session.close()
+
+    assert export_time_allocations() == {
+        "g1": [{"Meeting": 5.0, "Research": 2.5}, {}],
+        "g2": [{"Analysis": 8.0}],
+    }
+
+
+def test_streaming_export_endpoint(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    allocations = [
+        models.TimeAllocation(group_id="g1", activities={"Meeting": 5, "Research": 2.5}, timestamp=datetime(2024, 1, 1)),
+        models.TimeAllocation(group_id="g2", activities={"Analysis": 8}, timestamp=datetime(2024, 2, 1)),
+    ]
+    session.add_all(allocations)
+    record_new_allocations(session, allocations)
+    session.commit()
+    second_id = allocations[1].id
+    session.close()
+    client = app.test_client()
+
+    resp = client.get("/api/export/time-allocations")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [line["group_id"] for line in lines] == ["g1", "g2"]
+    assert lines[0]["activities"] == {"Meeting": 5, "Research": 2.5}
+
+    resp = client.get("/api/export/time-allocations?format=csv&start_date=2024-01-15")
+    assert resp.mimetype == "text/csv"
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0] == ["allocation_id", "group_id", "timestamp", "activity", "hours"]
+    assert rows[1:] == [[str(second_id), "g2", "2024-02-01T00:00:00", "Analysis", "8.0"]]
+
+    assert client.get("/api/export/time-allocations?format=xml").status_code == 400
+
+
+def test_migrate_activity_logs_is_chunked_and_resumable(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    for group_id, activity in [("g1", "Dev"), ("g1", "Dev"), ("g2", "QA"), ("g1", "QA"), ("g2", "QA")]:
+        session.add(models.ActivityLog(group_id=group_id, activity=activity, sub_activity="A"))
+    session.commit()
+    session.close()
+
+    calls = []
+
+    def fail_second_chunk(session, allocations):
+        calls.append(allocations)
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        return record_new_allocations(session, allocations)
+
+    with patch("time_profiler.data_migration.record_new_allocations", fail_second_chunk):
+        with pytest.raises(RuntimeError):
+            migrate_activity_logs_to_time_allocations(chunk_size=2)
+
+    session = SessionLocal()
+    assert session.query(models.MigrationCheckpoint).one().last_id == 2
+    session.close()
+
+    migrate_activity_logs_to_time_allocations(chunk_size=2)
+    assert migrate_activity_logs_to_time_allocations(chunk_size=2) == 0
+
+    totals = {}
+    for group_id, activities in export_time_allocations().items():
+        for entry in activities:
+            for activity, hours in entry.items():
+                totals[(group_id, activity)] = totals.get((group_id, activity), 0) + hours
+    assert totals == {("g1", "Dev"): 2.0, ("g1", "QA"): 1.0, ("g2", "QA"): 2.0}
+
+
+def test_migrate_activity_logs_skips_legacy_watermark(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    for activity in ["Dev", "Dev", "QA", "QA"]:
+        session.add(models.ActivityLog(group_id="g1", activity=activity, sub_activity="A"))
+    # Written by the pre-checkpoint migration for the first three logs
+    session.add(models.TimeAllocation(group_id="g1", activities={"Dev": 2.0, "QA": 1.0}))
+    session.commit()
+    session.close()
+
+    assert migrate_activity_logs_to_time_allocations(legacy_watermark=3) == 1
+    # The watermark only seeds the first run
+    assert migrate_activity_logs_to_time_allocations(legacy_watermark=0) == 0
+
+    assert export_time_allocations() == {"g1": [{"Dev": 2.0, "QA": 1.0}, {"QA": 1.0}]}
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from time_profiler import create_app, SessionLocal, models
+from time_profiler.data_retention import run_retention_tasks
+
+
+def setup_app(tmp_path):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({"TESTING": True, "DATABASE_URL": db_url})
+    return app
+
+
+def add_history(session, user_id, submission_type, data, day):
+    session.add(models.UserSubmissionHistory(
+        user_id=user_id,
+        submission_type=submission_type,
+        submission_data=data,
+        timestamp=datetime(2024, 1, day),
+    ))
+
+
+def test_retention_archives_all_but_latest(tmp_path):
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    add_history(session, "u1", "time_allocation", {"activities": {"Meeting": 10}}, 1)
+    add_history(session, "u1", "time_allocation", {"activities": {"Meeting": 20, "Research": 4}}, 2)
+    add_history(session, "u1", "time_allocation", {"activities": {"Meeting": 99}}, 3)
+    add_history(session, "u1", "activity_log", {"activity": "Dev"}, 1)
+    add_history(session, "u2", "activity_log", {"activity": "Dev"}, 1)
+    add_history(session, "u2", "activity_log", {"activity": "Dev"}, 2)
+    add_history(session, "u2", "activity_log", {"activity": "QA"}, 3)
+    add_history(session, "u2", "activity_log", {"activity": "QA"}, 4)
+    session.commit()
+    session.close()
+
+    run_retention_tasks(batch_size=1)
+
+    session = SessionLocal()
+    current = {
+        (h.user_id, h.submission_type, h.timestamp.day)
+        for h in session.query(models.UserSubmissionHistory).filter_by(is_current=True)
+    }
+    assert current == {("u1", "time_allocation", 3), ("u1", "activity_log", 1), ("u2", "activity_log", 4)}
+    archived = session.query(models.UserSubmissionHistory).filter_by(is_current=False).all()
+    assert all(h.archived_at is not None for h in archived)
+
+    summaries = {(s.user_id, s.submission_type): s for s in session.query(models.SubmissionSummary)}
+    assert set(summaries) == {("u1", "time_allocation"), ("u2", "activity_log")}
+    allocation_summary = summaries[("u1", "time_allocation")]
+    assert allocation_summary.summary_data == {"Meeting": 15, "Research": 2}
+    assert allocation_summary.start_period == datetime(2024, 1, 1)
+    assert allocation_summary.end_period == datetime(2024, 1, 2)
+    assert summaries[("u2", "activity_log")].summary_data == {"Dev": 2, "QA": 1}
+    session.close()
+
+    # A second run has nothing new to archive
+    run_retention_tasks()
+    session = SessionLocal()
+    assert session.query(models.SubmissionSummary).count() == 2
+    session.close()
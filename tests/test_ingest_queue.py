@@ -0,0 +1,88 @@
+import time
+from pathlib import Path
+
+from time_profiler import create_app, SessionLocal, models
+from time_profiler.app import load_config
+from time_profiler.ingest import IngestionQueue
+
+
+def setup_app(tmp_path):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({
+        "TESTING": True,
+        "DATABASE_URL": db_url,
+        "INGEST_QUEUE_ENABLED": True,
+        "INGEST_BATCH_SIZE": 50,
+        "INGEST_MAX_DELAY": 30,
+    })
+    return app
+
+
+def test_queued_submissions_are_group_committed(tmp_path):
+    app = setup_app(tmp_path)
+    client = app.test_client()
+    ingest_queue = app.extensions["ingest_queue"]
+
+    config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
+    group_id = config["groups"][0]["id"]
+    activity = config["activities"][0]["category"]
+
+    for hours in (1, 2, 3):
+        resp = client.post("/api/submit-allocation", json={"group_id": group_id, "activities": {activity: hours}})
+        assert resp.status_code == 202
+    resp = client.post("/api/chatbot-feedback", json={"user_id": "u1", "message": "hello"})
+    assert resp.status_code == 202
+
+    assert client.get("/api/admin/ingest-stats").get_json()["depth"] == 4
+    ingest_queue.flush()
+
+    stats = client.get("/api/admin/ingest-stats").get_json()
+    assert stats["enabled"] is True
+    assert stats["written"] == 4
+    assert stats["batches"] == 1
+    assert stats["depth"] == 0
+
+    session = SessionLocal()
+    assert session.query(models.TimeAllocation).count() == 3
+    assert session.query(models.ChatbotFeedback).count() == 1
+    assert session.query(models.AllocationDailyRollup).one().total_hours == 6
+    session.close()
+    ingest_queue.close()
+
+
+def test_close_drains_queue_and_rejects_new_items(tmp_path):
+    app = setup_app(tmp_path)
+    ingest_queue = IngestionQueue(batch_size=2, max_delay=30)
+
+    for i in range(5):
+        assert ingest_queue.submit(models.ChatbotFeedback(user_id=f"u{i}", message_text="hi", message_type="general"))
+    ingest_queue.close()
+
+    assert ingest_queue.submit(models.ChatbotFeedback(user_id="late", message_text="hi", message_type="general")) is False
+    stats = ingest_queue.stats()
+    assert stats["written"] == 5
+    assert stats["batches"] == 3
+
+    session = SessionLocal()
+    assert session.query(models.ChatbotFeedback).count() == 5
+    session.close()
+    app.extensions["ingest_queue"].close()
+
+
+def test_batches_stay_full_under_backlog(tmp_path):
+    setup_app(tmp_path)
+    sizes = []
+
+    def slow_writer(session, objects):
+        sizes.append(len(objects))
+        time.sleep(0.2)
+
+    ingest_queue = IngestionQueue(batch_size=100, max_delay=0.1, writer=slow_writer)
+    for i in range(300):
+        assert ingest_queue.submit(i)
+    ingest_queue.flush()
+    ingest_queue.close()
+
+    # Rows that waited past max_delay behind a slow commit still fill a batch
+    assert sizes == [100, 100, 100]
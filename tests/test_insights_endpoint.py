@@ -30,3 +30,92 @@ def test_insights_endpoint(tmp_path):
     assert "solution_stats" in data
     assert data["problem_stats"]["total"] == 1
     assert data["solution_stats"]["total"] == 1
+
+
+def test_feedback_sentiment_stored_and_averaged(tmp_path):
+    from time_profiler.ai_insights import analyze_sentiment
+    from time_profiler.data_migration import backfill_feedback_sentiment
+
+    app = setup_app(tmp_path)
+    client = app.test_client()
+
+    client.post("/api/chatbot-feedback", json={"user_id": "u1", "message": "I love the new dashboard"})
+    session = SessionLocal()
+    stored = session.query(models.ChatbotFeedback).one()
+    assert stored.sentiment == analyze_sentiment("I love the new dashboard")
+    session.add(models.ChatbotFeedback(user_id="u2", message_text="This is terrible", message_type="general"))
+    session.commit()
+    session.close()
+
+    assert backfill_feedback_sentiment(batch_size=1) == 1
+    assert backfill_feedback_sentiment() == 0
+
+    expected = (analyze_sentiment("I love the new dashboard") + analyze_sentiment("This is terrible")) / 2
+    data = client.get("/api/insights").get_json()
+    assert abs(data["feedback_stats"]["sentiment"] - expected) < 1e-9
+
+
+def test_parallel_sentiment_backfill(tmp_path):
+    from time_profiler.ai_insights import analyze_sentiment, analyze_sentiment_batch
+    from time_profiler.ai_insights.sentiment import sentiment_pool
+    from time_profiler.data_migration import backfill_feedback_sentiment
+
+    texts = ["great work", "awful outage", "", "meh", "really helpful team"] * 3
+    with sentiment_pool(2) as pool:
+        assert analyze_sentiment_batch(texts, pool, chunk_size=4) == [analyze_sentiment(t) for t in texts]
+
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    for i, text in enumerate(texts):
+        session.add(models.ChatbotFeedback(user_id=f"u{i}", message_text=text or "-", message_type="general"))
+    session.commit()
+    session.close()
+
+    assert backfill_feedback_sentiment(batch_size=6, workers=2) == len(texts)
+    session = SessionLocal()
+    rows = session.query(models.ChatbotFeedback).all()
+    session.close()
+    assert all(r.sentiment == analyze_sentiment(r.message_text) for r in rows)
+
+
+def test_insights_snapshot_cached_until_write(tmp_path):
+    from sqlalchemy import event
+
+    app = setup_app(tmp_path)
+    client = app.test_client()
+
+    session = SessionLocal()
+    problem = models.ProblemIdentification(description="Slow VPN", status="identified")
+    session.add(problem)
+    session.flush()
+    session.add(models.SolutionSuggestion(problem_id=problem.id, description="Upgrade", status="implemented", actual_savings=4, roi_score=2.0))
+    session.add(models.SolutionSuggestion(problem_id=problem.id, description="Replace", status="implemented", actual_savings=6))
+    session.add(models.SolutionSuggestion(problem_id=problem.id, description="Review", status="proposed"))
+    session.commit()
+    session.close()
+
+    data = client.get("/api/insights").get_json()
+    assert data["problem_stats"] == {"total": 1, "active": 1, "resolved": 0}
+    assert data["solution_stats"]["total"] == 3
+    assert data["solution_stats"]["implemented"] == 2
+    assert data["solution_stats"]["pipeline"] == {"implemented": 2, "proposed": 1}
+    assert data["roi"] == {"total_savings": 10, "average_roi": 2.0}
+
+    statements = []
+    engine = SessionLocal().get_bind()
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/insights").get_json() == data
+        assert statements == []
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    client.post("/api/problems", json={"description": "Printer jam"})
+    assert client.get("/api/insights").get_json()["problem_stats"]["total"] == 2
+
+    session = SessionLocal()
+    session.query(models.ProblemIdentification).update({"status": "resolved"})
+    session.commit()
+    session.close()
+    assert client.get("/api/insights").get_json()["problem_stats"]["resolved"] == 2
@@ -1,5 +1,9 @@
 import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
+
+import pytest
 from time_profiler import create_app, SessionLocal, models
 from time_profiler.ai_insights import (
     JiraClient,
@@ -8,7 +12,10 @@ from time_profiler.ai_insights import (
     escalate_ticket,
     archive_and_create_new_ticket,
     update_solution_impact,
+    create_tickets_if_not_exist,
+    escalate_tickets,
 )
+from time_profiler.ai_insights.jira_integration import JIRA_BULK_CREATE_LIMIT, JiraHTTPSession
 
 
 def setup_app(tmp_path):
@@ -20,7 +27,7 @@ def setup_app(tmp_path):
 
 def test_jira_client_create_ticket_success():
     client = JiraClient("https://jira.example.com", "user", "token", "PROJ")
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 201
         mock_post.return_value.json.return_value = {"key": "PROJ-1"}
         key = client.create_ticket("Bug found", "Details")
@@ -37,7 +44,7 @@ def test_mcp_jira_client_create_ticket_via_mcp():
         "PROJ",
         "https://mcp.example.com/agent",
     )
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {"ticket_key": "PROJ-2"}
         key = client.create_ticket_via_mcp("Issue", "More info")
@@ -57,7 +64,7 @@ def test_create_ticket_if_not_exists(tmp_path):
     problem_id = problem.id
     session.close()
 
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 201
         mock_post.return_value.json.return_value = {"key": "PROJ-1"}
         session = SessionLocal()
@@ -84,7 +91,7 @@ def test_escalate_and_archive(tmp_path):
     ticket_id = ticket.id
     session.close()
 
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         # first two calls for transitions return 200, final call for new ticket returns 201
         mock_post.side_effect = [
             type("Resp", (), {"status_code": 200, "text": "ok"})(),
@@ -118,3 +125,170 @@ def test_update_solution_impact(tmp_path):
     session.refresh(solution)
     assert solution.actual_savings == 8
 
+
+@pytest.fixture
+def jira_server():
+    """Local stand-in Jira server answering with queued (status, headers, body)."""
+    state = {"responses": [], "paths": [], "bodies": [], "ports": set(), "responder": None}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                state["paths"].append(self.path)
+                state["bodies"].append(payload)
+                state["ports"].add(self.client_address[1])
+                if state["responder"]:
+                    status, headers, body = state["responder"](self.path, payload)
+                else:
+                    status, headers, body = state["responses"].pop(0)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_jira_client_retries_and_records_latency(jira_server):
+    http = JiraHTTPSession(max_retries=2, backoff_factor=0)
+    client = JiraClient(jira_server["url"], "user", "token", "PROJ", http=http)
+    jira_server["responses"] = [
+        (503, {}, {}),
+        (429, {"Retry-After": "0"}, {}),
+        (201, {}, {"key": "PROJ-7"}),
+        (200, {}, {}),
+        (200, {}, {}),
+    ]
+
+    assert client.create_ticket("Bug", "Details") == "PROJ-7"
+    client.transition_ticket("PROJ-7", "escalate")
+    client.transition_ticket("PROJ-7", "close")
+
+    assert jira_server["paths"][:3] == ["/rest/api/2/issue"] * 3
+    assert jira_server["paths"][3:] == ["/rest/api/2/issue/PROJ-7/transitions"] * 2
+    # All five requests reused one pooled connection
+    assert len(jira_server["ports"]) == 1
+    stats = http.stats()
+    assert stats["create_ticket"]["count"] == 1
+    assert stats["transition_ticket"]["count"] == 2
+    assert stats["transition_ticket"]["errors"] == 0
+    assert stats["transition_ticket"]["max_ms"] >= stats["transition_ticket"]["avg_ms"] > 0
+
+
+def test_jira_client_gives_up_after_retries(jira_server):
+    http = JiraHTTPSession(max_retries=1, backoff_factor=0)
+    client = MCPJiraClient(jira_server["url"], "user", "token", "PROJ", jira_server["url"] + "/agent", http=http)
+    jira_server["responses"] = [(503, {}, {}), (503, {}, {"error": "down"})]
+
+    with pytest.raises(RuntimeError):
+        client.create_ticket_via_mcp("Issue", "More info")
+    assert jira_server["paths"] == ["/agent", "/agent"]
+    assert http.stats()["mcp_create_ticket"]["count"] == 1
+
+
+def test_jira_client_does_not_retry_gateway_errors(jira_server):
+    client = JiraClient(jira_server["url"], "user", "token", "PROJ", http=JiraHTTPSession(backoff_factor=0))
+    jira_server["responses"] = [(502, {}, {}), (201, {}, {"key": "PROJ-8"})]
+
+    # The issue may already exist behind a gateway error, so it is not re-sent
+    with pytest.raises(RuntimeError):
+        client.create_ticket("Bug", "Details")
+    assert jira_server["paths"] == ["/rest/api/2/issue"]
+
+
+def test_bulk_create_and_escalate(tmp_path, jira_server):
+    app = setup_app(tmp_path)
+    client = JiraClient(jira_server["url"], "user", "token", "PROJ", http=JiraHTTPSession(backoff_factor=0))
+
+    session = SessionLocal()
+    problems = [models.ProblemIdentification(description=f"Bug {i}") for i in range(3)]
+    session.add_all(problems)
+    session.flush()
+    ids = [p.id for p in problems]
+    session.add(models.JiraTicketLifecycle(problem_id=ids[0], ticket_key="PROJ-1", status="Open", priority="Low"))
+    session.commit()
+
+    # Jira rejects the first of the two new issues
+    jira_server["responses"] = [
+        (201, {}, {"issues": [{"key": "PROJ-11"}], "errors": [{"failedElementNumber": 0, "elementErrors": {}}]}),
+    ]
+    tickets = create_tickets_if_not_exist(session, client, [(pid, f"Bug {pid}", "Details") for pid in ids])
+    assert jira_server["paths"] == ["/rest/api/2/issue/bulk"]
+    assert len(jira_server["bodies"][0]["issueUpdates"]) == 2
+    assert sorted(tickets) == [ids[0], ids[2]]
+    assert tickets[ids[0]].ticket_key == "PROJ-1"
+    assert tickets[ids[2]].ticket_key == "PROJ-11"
+    assert session.query(models.JiraTicketLifecycle).count() == 2
+
+    jira_server["paths"].clear()
+    jira_server["responder"] = lambda path, body: (404, {}, {}) if "PROJ-1/" in path else (200, {}, {})
+    escalated = escalate_tickets(session, client, list(tickets.values()), "High", max_workers=4)
+    assert [t.ticket_key for t in escalated] == ["PROJ-11"]
+    session.expire_all()
+    rows = {t.ticket_key: t for t in session.query(models.JiraTicketLifecycle)}
+    assert rows["PROJ-11"].priority == "High"
+    assert rows["PROJ-11"].escalation_count == 1
+    assert rows["PROJ-1"].priority == "Low"
+    assert sorted(jira_server["paths"]) == [
+        "/rest/api/2/issue/PROJ-1/transitions",
+        "/rest/api/2/issue/PROJ-11/transitions",
+    ]
+    session.close()
+
+
+def test_bulk_create_keeps_chunks_created_before_a_failure(tmp_path, jira_server):
+    app = setup_app(tmp_path)
+    client = JiraClient(jira_server["url"], "user", "token", "PROJ", http=JiraHTTPSession(max_retries=0))
+
+    session = SessionLocal()
+    problems = [models.ProblemIdentification(description=f"Bug {i}") for i in range(JIRA_BULK_CREATE_LIMIT + 1)]
+    session.add_all(problems)
+    session.commit()
+    ids = [p.id for p in problems]
+
+    created = iter(range(1, 1000))
+
+    def first_chunk_only(path, body):
+        if len(jira_server["bodies"]) > 1:
+            return 500, {}, {"errorMessages": ["Internal error"]}
+        return 201, {}, {"issues": [{"key": f"PROJ-{next(created)}"} for _ in body["issueUpdates"]]}
+
+    jira_server["responder"] = first_chunk_only
+    tickets = create_tickets_if_not_exist(session, client, [(pid, f"Bug {pid}", "Details") for pid in ids])
+    assert sorted(tickets) == ids[:JIRA_BULK_CREATE_LIMIT]
+    assert session.query(models.JiraTicketLifecycle).count() == JIRA_BULK_CREATE_LIMIT
+
+    # A retry only creates the issue whose chunk failed
+    jira_server["bodies"].clear()
+    jira_server["responder"] = lambda path, body: (201, {}, {"issues": [{"key": "PROJ-99"}]})
+    tickets = create_tickets_if_not_exist(session, client, [(pid, f"Bug {pid}", "Details") for pid in ids])
+    assert len(jira_server["bodies"]) == 1
+    assert len(jira_server["bodies"][0]["issueUpdates"]) == 1
+    assert tickets[ids[-1]].ticket_key == "PROJ-99"
+    session.close()
+
+
+def test_bulk_create_via_mcp(jira_server):
+    client = MCPJiraClient(
+        jira_server["url"], "user", "token", "PROJ", jira_server["url"] + "/agent", http=JiraHTTPSession()
+    )
+    jira_server["responses"] = [(200, {}, {"ticket_keys": ["PROJ-5", None]})]
+    assert client.create_tickets([("A", "a"), ("B", "b")]) == ["PROJ-5", None]
+    body = jira_server["bodies"][0]
+    assert body["action"] == "create_tickets"
+    assert [t["summary"] for t in body["data"]["tickets"]] == ["A", "B"]
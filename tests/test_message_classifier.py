@@ -0,0 +1,38 @@
+from time_profiler.chatbot.base import BaseChatbotService
+from time_profiler.chatbot.classifier import MessageClassifier
+
+
+def test_default_classification():
+    service = BaseChatbotService()
+    assert service._classify_message("I spent 4 hours on analysis") == "time_allocation"
+    assert service._classify_message("50% on meetings, 50% on research") == "time_allocation"
+    assert service._classify_message("The export is BROKEN again") == "problem_report"
+    assert service._classify_message("Found two bugs in the portal") == "problem_report"
+    assert service._classify_message("We completed the submission") == "success_story"
+    assert service._classify_message("Show me my dashboard") == "general"
+
+
+def test_word_boundaries():
+    classifier = MessageClassifier()
+    # Substrings of longer words no longer count
+    assert classifier.classify("Sometimes we dwell on it") == "general"
+    assert classifier.classify("debugging notes") == "general"
+    assert classifier.classify("working   on the grant") == "time_allocation"
+
+
+def test_scores_pick_strongest_category():
+    classifier = MessageClassifier()
+    text = "Time to report a frustrating issue: the upload is broken"
+    assert classifier.scores(text) == {"time_allocation": 1, "problem_report": 3}
+    assert classifier.classify(text) == "problem_report"
+    # Ties go to the category listed first
+    assert classifier.classify("good bug") == "problem_report"
+
+
+def test_configurable_table():
+    classifier = MessageClassifier({"greeting": ["hello", "good morning"], "farewell": ["bye*"]}, default="other")
+    assert classifier.classify("Good  morning team") == "greeting"
+    assert classifier.classify("byebye") == "farewell"
+    assert classifier.classify("goodness") == "other"
+    service = BaseChatbotService(classifier=classifier)
+    assert service._classify_message("hello") == "greeting"
@@ -1,5 +1,5 @@
 from pathlib import Path
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
 from alembic.config import Config
 from alembic import command
 
@@ -15,3 +15,39 @@ def test_run_migrations(tmp_path):
     inspector = inspect(engine)
     assert "activity_logs" in inspector.get_table_names()
 
+
+def test_migrations_create_query_indexes(tmp_path):
+    """Indexes declared on the models are created by the migrations."""
+    db_path = tmp_path / "test.db"
+    cfg = Config(str(Path(__file__).resolve().parents[1] / "alembic.ini"))
+    cfg.set_main_option("sqlalchemy.url", f"sqlite:///{db_path}")
+    command.upgrade(cfg, "head")
+
+    inspector = inspect(create_engine(f"sqlite:///{db_path}"))
+    feedback_indexes = {ix["name"] for ix in inspector.get_indexes("chatbot_feedback")}
+    assert "ix_chatbot_feedback_unprocessed" in feedback_indexes
+    assert "ix_chatbot_feedback_type_user" in feedback_indexes
+    allocation_indexes = {ix["name"] for ix in inspector.get_indexes("time_allocations")}
+    assert "ix_time_allocations_group_id_timestamp" in allocation_indexes
+
+    command.downgrade(cfg, "0007")
+
+
+def test_allocation_hours_backfilled_for_existing_rows(tmp_path):
+    """Migration 0007 derives hours rows for allocations stored before it."""
+    db_path = tmp_path / "test.db"
+    cfg = Config(str(Path(__file__).resolve().parents[1] / "alembic.ini"))
+    cfg.set_main_option("sqlalchemy.url", f"sqlite:///{db_path}")
+    command.upgrade(cfg, "0006")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO time_allocations (group_id, activities, timestamp) "
+            "VALUES ('g1', '{\"Meeting\": 5, \"Research\": 2.5}', '2024-01-01 00:00:00')"
+        ))
+    command.upgrade(cfg, "0007")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT activity, hours FROM allocation_activity_hours ORDER BY activity")).all()
+    assert [tuple(row) for row in rows] == [("Meeting", 5.0), ("Research", 2.5)]
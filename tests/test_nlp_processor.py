@@ -10,3 +10,45 @@ def test_parse_time_allocation():
     assert result["Meeting"] == 50
     assert result["Research"] == 30
     assert result["Administration"] == 20
+
+
+def test_parse_multi_word_and_misspelled_activities():
+    config_path = Path(__file__).resolve().parents[1] / "config" / "dcri_config.json.example"
+    nlp = NLPProcessor(config_path)
+    assert nlp.parse_time_allocation(
+        "40% on grant writing and submission, 60% statistcal analysis and reporting"
+    ) == {"Research": 40, "Analysis": 60}
+    assert nlp.parse_time_allocation(
+        "3 hours in internal team meetings and 2 hours of budget & financial management"
+    ) == {"Meeting": 3, "Administration": 2}
+    assert nlp.parse_time_allocation("50% meetngs, 25% reserach, 25% Project Managment") == {
+        "Meeting": 50,
+        "Research": 25,
+        "Project Management": 25,
+    }
+    assert nlp.parse_time_allocation("5 apples and 10% admin") == {"Administration": 10}
+    assert nlp.map_activity("project management") == "Project Management"
+    assert nlp.map_activity("project planning") is None
+
+
+def test_vocabulary_rebuilt_per_config_version(tmp_path):
+    import json
+    import os
+
+    config_path = tmp_path / "config.json"
+    config = {
+        "activities": [{"category": "Meeting", "sub_activities": []}],
+        "activitySynonyms": {"standup": "Meeting"},
+    }
+    config_path.write_text(json.dumps(config))
+    nlp = NLPProcessor(config_path)
+    other = NLPProcessor(config_path)
+    vocabulary = nlp.vocabulary
+    assert other.vocabulary is vocabulary
+    assert nlp.parse_time_allocation("30% standup, 70% lab work") == {"Meeting": 30}
+
+    config["activities"].append({"category": "Lab", "sub_activities": ["Lab Work"]})
+    config_path.write_text(json.dumps(config))
+    os.utime(config_path, ns=(0, 10**18))
+    assert nlp.vocabulary is not vocabulary
+    assert nlp.parse_time_allocation("30% standup, 70% lab work") == {"Meeting": 30, "Lab": 70}
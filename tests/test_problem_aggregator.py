@@ -1,5 +1,7 @@
+from datetime import datetime, timedelta
+
 from time_profiler import create_app, SessionLocal
-from time_profiler.ai_insights import ProblemAggregator
+from time_profiler.ai_insights import ProblemAggregator, get_problem_index
 from time_profiler import models
 
 
@@ -33,3 +35,124 @@ def test_trending_problems(tmp_path):
     trending = aggregator.trending_problems(within_days=1, min_reports=2)
     assert trending
 
+
+def test_problem_index_matches_brute_force(tmp_path):
+    app = setup_app(tmp_path)
+    aggregator = ProblemAggregator()
+    descriptions = [
+        "VPN disconnects during video calls",
+        "Printer on floor two is jammed",
+        "Expense reports take too long to approve",
+        "Shared drive permissions are confusing",
+    ]
+    session = SessionLocal()
+    for d in descriptions:
+        session.add(models.ProblemIdentification(description=d))
+    session.commit()
+
+    index = get_problem_index(session)
+    assert len(index) == len(descriptions)
+    problems = session.query(models.ProblemIdentification).order_by(models.ProblemIdentification.id).all()
+    for query in ["my vpn keeps dropping", "approval of expense report", "coffee machine"]:
+        tokens = aggregator._tokenize(query)
+        expected = [p.id for p in problems if aggregator._similar(p.description, query)]
+        assert index.candidates(tokens, aggregator.similarity_threshold) == expected
+    session.close()
+
+
+def test_problem_index_follows_description_updates(tmp_path):
+    app = setup_app(tmp_path)
+    client = app.test_client()
+    aggregator = ProblemAggregator()
+
+    aggregator.record_problem("Badge reader broken at entrance")
+    session = SessionLocal()
+    problem_id = session.query(models.ProblemIdentification.id).scalar()
+    session.close()
+
+    client.patch(f"/api/problems/{problem_id}", json={"description": "Parking garage gate stuck"})
+    aggregator.record_problem("parking gate stuck again")
+
+    session = SessionLocal()
+    problems = session.query(models.ProblemIdentification).all()
+    session.close()
+    assert len(problems) == 1
+    assert problems[0].frequency_count == 2
+
+
+def test_trending_uses_reports_inside_window(tmp_path):
+    app = setup_app(tmp_path)
+    aggregator = ProblemAggregator()
+    today = datetime.utcnow().date()
+
+    session = SessionLocal()
+    old = models.ProblemIdentification(description="Old timesheet bug", frequency_count=50)
+    fresh = models.ProblemIdentification(description="New VPN outage", frequency_count=3)
+    session.add_all([old, fresh])
+    session.flush()
+    session.add_all([
+        models.ProblemReportCount(problem_id=old.id, day=today - timedelta(days=60), report_count=49),
+        models.ProblemReportCount(problem_id=old.id, day=today, report_count=1),
+        models.ProblemReportCount(problem_id=fresh.id, day=today - timedelta(days=6), report_count=2),
+        models.ProblemReportCount(problem_id=fresh.id, day=today, report_count=1),
+    ])
+    session.commit()
+    fresh_id = fresh.id
+    session.close()
+
+    trending = aggregator.trending_problems(within_days=7, min_reports=2)
+    assert trending == [(fresh_id, "New VPN outage", 3)]
+
+    # With a one-day half-life the six-day-old reports barely count
+    assert aggregator.trending_problems(within_days=7, min_reports=2, half_life_days=1) == []
+    assert aggregator.trending_problems(within_days=7, min_reports=1, half_life_days=1)[0][0] == fresh_id
+
+
+def test_problem_index_picks_up_lower_ids_from_other_workers(tmp_path):
+    app = setup_app(tmp_path)
+    aggregator = ProblemAggregator()
+    aggregator.record_problem("Timesheet page times out")
+
+    # Another worker commits a row whose id was allocated before ours
+    other = SessionLocal.session_factory()
+    local_id = other.query(models.ProblemIdentification.id).scalar()
+    other.add(models.ProblemIdentification(id=local_id - 1, description="Calendar sync drops meetings"))
+    other.commit()
+    other.close()
+
+    aggregator.record_problem("calendar sync dropping meetings")
+
+    session = SessionLocal()
+    problems = {p.description: p.frequency_count for p in session.query(models.ProblemIdentification)}
+    session.close()
+    assert problems == {"Timesheet page times out": 1, "Calendar sync drops meetings": 2}
+
+
+def test_problem_index_probe_is_bounded_and_reconciles_on_a_timer(tmp_path):
+    from sqlalchemy import event
+
+    app = setup_app(tmp_path)
+    session = SessionLocal()
+    session.add_all([models.ProblemIdentification(id=i, description=f"Problem {i}") for i in (1, 50)])
+    session.commit()
+    index = get_problem_index(session)
+    index.lookback = 10
+
+    # Committed by another worker far below the newest id
+    session.add(models.ProblemIdentification(id=20, description="Old printer jam"))
+    session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(session.get_bind(), "before_cursor_execute", listener)
+    try:
+        index.sync(session)
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 1 and "count(" not in statements[0].lower()
+    assert len(index) == 2
+
+    # The periodic reconciliation picks it up
+    index.reconcile(session)
+    assert len(index) == 3
+    session.close()
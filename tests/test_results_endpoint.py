@@ -89,3 +89,33 @@ def test_results_endpoint_filters(tmp_path):
     data = resp.get_json()
     assert len(data) == 1
     assert data[0]["group_id"] == group2
+
+
+def test_results_endpoint_time_allocations(tmp_path):
+    app = setup_app(tmp_path)
+    client = app.test_client()
+
+    config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
+    group1 = config["groups"][0]["id"]
+    group2 = config["groups"][1]["id"]
+    act1 = config["activities"][0]["category"]
+    act2 = config["activities"][1]["category"]
+
+    client.post("/api/submit-allocation", json={"group_id": group1, "activities": {act1: 10, act2: 30}})
+    client.post("/api/submit-allocation", json={"group_id": group1, "activities": {act1: 20}})
+    client.post("/api/submit-allocation", json={"group_id": group2, "activities": {act2: 5.5}})
+
+    resp = client.get("/api/results")
+    assert resp.status_code == 200
+    data = {(r["group_id"], r["activity"]): r for r in resp.get_json()}
+    assert len(data) == 3
+    assert data[(group1, act1)]["total_hours"] == 30
+    assert data[(group1, act1)]["count"] == 50
+    assert data[(group1, act2)]["total_hours"] == 30
+    assert data[(group2, act2)]["total_hours"] == 5.5
+    assert data[(group2, act2)]["count"] == 100
+
+    resp = client.get(f"/api/results?group_id={group2}")
+    data = resp.get_json()
+    assert len(data) == 1
+    assert data[0]["group_id"] == group2
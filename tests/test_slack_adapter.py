@@ -1,32 +1,134 @@
 import asyncio
-from unittest.mock import patch
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
 
 from time_profiler.chatbot.adapters import SlackAdapter
 from time_profiler.chatbot.base import ChatResponse
+from time_profiler.chatbot.http_client import AsyncHTTPClient
 
 
-def test_slack_send_message_success():
-    adapter = SlackAdapter(bot_token="xoxb-test", default_channel="")
-    response = ChatResponse("hi")
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"ok": True}
-        result = asyncio.run(adapter.send_message("U123", response))
-        assert result is True
-        args, kwargs = mock_post.call_args
-        assert args[0] == "https://slack.com/api/chat.postMessage"
-        headers = kwargs["headers"]
-        assert headers["Authorization"] == "Bearer xoxb-test"
-        payload = kwargs["json"]
-        assert payload["channel"] == "U123"
-        assert payload["text"] == "hi"
-
-
-def test_slack_send_message_failure():
-    adapter = SlackAdapter(bot_token="xoxb-test", default_channel="")
+class FakeSlack:
+    """Local stand-in for the Slack Web API."""
+
+    def __init__(self):
+        self.requests = []
+        self.client_ports = set()
+        self.responses = []  # queued (status, headers, body); default is ok
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with fake.lock:
+                    fake.requests.append((self.path, dict(self.headers), json.loads(body)))
+                    fake.client_ports.add(self.client_address[1])
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    status, headers, payload = fake.responses.pop(0) if fake.responses else (200, {}, {"ok": True})
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.in_flight -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def slack():
+    fake = FakeSlack()
+    yield fake
+    fake.close()
+
+
+def make_adapter(slack, **client_kwargs):
+    client = AsyncHTTPClient(**client_kwargs)
+    return SlackAdapter(bot_token="xoxb-test", default_channel="", api_url=slack.url, http_client=client)
+
+
+def test_slack_send_message_success(slack):
+    adapter = make_adapter(slack)
     response = ChatResponse("hi")
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"ok": False}
-        result = asyncio.run(adapter.send_message("U123", response))
-        assert result is False
+    result = asyncio.run(adapter.send_message("U123", response))
+    assert result is True
+    path, headers, payload = slack.requests[0]
+    assert path == "/api/chat.postMessage"
+    assert headers["Authorization"] == "Bearer xoxb-test"
+    assert payload["channel"] == "U123"
+    assert payload["text"] == "hi"
+
+
+def test_slack_send_message_failure(slack):
+    adapter = make_adapter(slack)
+    slack.responses.append((200, {}, {"ok": False}))
+    result = asyncio.run(adapter.send_message("U123", ChatResponse("hi")))
+    assert result is False
+
+
+def test_slack_send_message_retries_after_rate_limit(slack):
+    adapter = make_adapter(slack, max_retries=2)
+    slack.responses.append((429, {"Retry-After": "0"}, {"ok": False, "error": "ratelimited"}))
+    slack.responses.append((429, {"Retry-After": "0.1"}, {"ok": False, "error": "ratelimited"}))
+
+    result = asyncio.run(adapter.send_message("U123", ChatResponse("hi")))
+    assert result is True
+    assert len(slack.requests) == 3
+    assert adapter.http_client.stats() == {"requests": 3, "rate_limited": 2, "errors": 0}
+
+    slack.responses.extend([(429, {"Retry-After": "0"}, {"ok": False})] * 3)
+    assert asyncio.run(adapter.send_message("U123", ChatResponse("hi"))) is False
+
+
+def test_slack_sends_share_bounded_pool(slack):
+    adapter = make_adapter(slack, max_connections=3)
+    slack.delay = 0.05
+
+    async def send_all():
+        loop_ticks = 0
+
+        async def ticker():
+            nonlocal loop_ticks
+            while True:
+                loop_ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick = asyncio.create_task(ticker())
+        results = await asyncio.gather(*[
+            adapter.send_message(f"U{i}", ChatResponse("hi")) for i in range(12)
+        ])
+        tick.cancel()
+        return results, loop_ticks
+
+    results, loop_ticks = asyncio.run(send_all())
+    assert results == [True] * 12
+    assert slack.max_in_flight <= 3
+    # Keep-alive: 12 requests over at most 3 pooled connections
+    assert len(slack.client_ports) <= 3
+    # The loop kept running while requests were outstanding
+    assert loop_ticks > 5
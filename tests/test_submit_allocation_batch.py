@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from time_profiler import create_app, SessionLocal, models
+from time_profiler.app import load_config
+
+
+def setup_app(tmp_path, **config):
+    SessionLocal.remove()
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    app = create_app({"TESTING": True, "DATABASE_URL": db_url, **config})
+    return app
+
+
+def test_batch_allocation_partial_success(tmp_path):
+    app = setup_app(tmp_path)
+    client = app.test_client()
+
+    config = load_config(Path(app.config["DCRI_CONFIG_PATH"]))
+    group_id = config["groups"][0]["id"]
+    activity = config["activities"][0]["category"]
+
+    payload = [
+        {"group_id": group_id, "activities": {activity: 10}},
+        {"group_id": "invalid", "activities": {activity: 5}},
+        {"group_id": group_id, "activities": {activity: -1}},
+        {"group_id": group_id, "activities": {activity: 7.5}, "feedback": "ok"},
+    ]
+    resp = client.post("/api/submit-allocation/batch", json=payload)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["status"] == "partial"
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    statuses = [r["status"] for r in data["results"]]
+    assert statuses == ["success", "error", "error", "success"]
+    assert data["results"][1]["error"] == "Invalid group_id"
+
+    session = SessionLocal()
+    allocations = session.query(models.TimeAllocation).order_by(models.TimeAllocation.id).all()
+    rollup = session.query(models.AllocationDailyRollup).one()
+    session.close()
+    assert [a.id for a in allocations] == [data["results"][0]["id"], data["results"][3]["id"]]
+    assert rollup.total_hours == 17.5
+
+
+def test_batch_allocation_rejects_bad_payloads(tmp_path):
+    app = setup_app(tmp_path, MAX_ALLOCATION_BATCH_SIZE=2)
+    client = app.test_client()
+
+    assert client.post("/api/submit-allocation/batch", json={"group_id": "x"}).status_code == 400
+    assert client.post("/api/submit-allocation/batch", json=[]).status_code == 400
+
+    too_many = [{"group_id": "x", "activities": {"A": 1}}] * 3
+    assert client.post("/api/submit-allocation/batch", json={"allocations": too_many}).status_code == 400
+
+    resp = client.post("/api/submit-allocation/batch", json=[{"group_id": "x", "activities": {"A": 1}}])
+    assert resp.status_code == 400
+    assert resp.get_json()["status"] == "error"